@@ -7,7 +7,6 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, WebDriverException, NoSuchElementException, StaleElementReferenceException
 from webdriver_manager.chrome import ChromeDriverManager
 from selenium_stealth import stealth
-import pandas as pd
 import time
 import json
 import os
@@ -28,6 +27,16 @@ import argparse
 import statistics
 from image_analyzer import ImageAnalyzer
 import glob
+from html import escape
+from string import Template
+from functools import lru_cache, partial
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import lxml.html
+try:
+    import orjson
+except ImportError:
+    orjson = None
+from lxml.cssselect import CSSSelector
 from src.card_analyzer2 import CardAnalyzer
 from rank_analyzer import RankAnalyzer, CardCondition
 
@@ -50,12 +59,277 @@ if not api_key:
     import sys
     sys.exit(1)
 
+# Static parts of the bookmarks HTML report, encoded once. Kept out of
+# str.format()/f-strings because the CSS braces would otherwise be parsed as
+# replacement fields.
+BOOKMARKS_HTML_HEAD = """
+                <!DOCTYPE html>
+                <html>
+                <head>
+                    <meta charset="utf-8">
+                    <title>Bookmarked Items</title>
+                    <style>
+                        body { font-family: Arial, sans-serif; margin: 20px; }
+                        .item { border: 1px solid #ddd; margin: 10px 0; padding: 15px; border-radius: 5px; }
+                        .item:hover { background-color: #f5f5f5; }
+                        .title { font-size: 1.2em; font-weight: bold; margin-bottom: 10px; }
+                        .price { color: #e44d26; font-weight: bold; }
+                        .details { margin: 10px 0; }
+                        .image { max-width: 200px; margin: 10px 0; }
+                        .links { margin-top: 10px; }
+                        .links a { margin-right: 15px; }
+                    </style>
+                </head>
+                <body>""".encode('utf-8')
+
+BOOKMARKS_HTML_FOOT = """
+                    </div>
+                </body>
+                </html>
+                """.encode('utf-8')
+
+# Shared parser for listing markup. Comments and the id lookup table are never
+# used by the extractors, so don't build them. Blank text is kept because
+# text_content() relies on it for the spaces between inline elements.
+# Parsers are not thread-safe; this one is only used from the scraping thread
+# (worker processes get their own copy on import).
+HTML_PARSER = lxml.html.HTMLParser(remove_comments=True, collect_ids=False)
+
+# Search result card fields, compiled from CSS to XPath once at import.
+# Each tuple is tried in priority order against a single card's markup.
+CARD_TITLE_SELECTORS = tuple(CSSSelector(selector) for selector in (
+    "h3[data-testid='item-card-title']",
+    "div.itemCard__itemName a",
+    "div.item-title a",
+    "a.item-title"
+))
+
+CARD_PRICE_SELECTORS = tuple(CSSSelector(selector) for selector in (
+    "span[data-testid='item-card-price']",
+    "div.g-priceDetails span.g-price",
+    "div.item-price",
+    "span.price"
+))
+
+CARD_THUMBNAIL_SELECTORS = tuple(CSSSelector(selector) for selector in (
+    "img[data-testid='item-card-image']",
+    "div.itemCard__image img",
+    "div.item-image img",
+    "img.item-image"
+))
+
+# Seconds between explicit wait polls. Selenium's default of 0.5s can leave a
+# page idle for up to half a second after the element we wait for appears.
+WAIT_POLL_FREQUENCY = 0.1
+
+# Number of detail pages fetched over HTTP at once. RequestHandler still
+# starts at most one request per polite delay to each host, so the workers
+# only overlap downloads, not the request rate
+DETAIL_FETCH_WORKERS = 4
+
+# Below this many pages, process start-up costs more than parsing serially
+PARALLEL_PARSE_MIN_PAGES = 32
+
+# Item detail page fields
+DETAIL_TITLE_SELECTOR = CSSSelector("h1.itemName")
+DETAIL_PRICE_SELECTOR = CSSSelector("span.price")
+DETAIL_DESCRIPTION_SELECTOR = CSSSelector("div.itemDescription")
+DETAIL_IMAGE_SELECTOR = CSSSelector("div.itemImage img")
+DETAIL_SELLER_SELECTOR = CSSSelector("div.sellerName")
+DETAIL_CONDITION_SELECTOR = CSSSelector("div.itemCondition")
+
+# Listing title/description patterns, compiled once at import
+RANK_PATTERN = re.compile(r'【ランク】\s*([A-Z]+)')
+SET_CODE_PATTERN = re.compile(r'([A-Z]{2,4})-([A-Z]{2})(\d{3})')
+CONDITION_SECTION_PATTERN = re.compile(r'【商品の状態】\s*(.*?)(?=\n|$)')
+YAHOO_AUCTION_ID_PATTERN = re.compile(r'/([a-z]\d+)(?:\?|$)')
+
+def _compile_keyword_table(table: Dict[str, List[str]]) -> Tuple[Tuple[str, re.Pattern], ...]:
+    """Compile each label's keywords into one alternation, keeping the table's priority order."""
+    return tuple(
+        (label, re.compile('|'.join(re.escape(keyword) for keyword in keywords)))
+        for label, keywords in table.items()
+    )
+
+def _first_text(tree, selector) -> Optional[str]:
+    """Return the stripped text of the first element matching selector, if any."""
+    matches = selector(tree)
+    return matches[0].text_content().strip() if matches else None
+
+def parse_detail_fields(html: str, url: str) -> Dict[str, Any]:
+    """Extract the raw listing fields from an item detail page's HTML."""
+    tree = lxml.html.fromstring(html, parser=HTML_PARSER)
+    
+    description = _first_text(tree, DETAIL_DESCRIPTION_SELECTOR)
+    if description is None:
+        description = "No description available"
+        logger.warning(f"No description found for item: {url}")
+    
+    images = [urljoin(url, img.get('src')) for img in DETAIL_IMAGE_SELECTOR(tree) if img.get('src')]
+    if not images:
+        logger.warning(f"No images found for item: {url}")
+    
+    seller = _first_text(tree, DETAIL_SELLER_SELECTOR)
+    if seller is None:
+        seller = "Unknown"
+        logger.warning(f"No seller information found for item: {url}")
+    
+    condition = _first_text(tree, DETAIL_CONDITION_SELECTOR)
+    if condition is None:
+        condition = "Unknown"
+        logger.warning(f"No condition information found for item: {url}")
+    
+    return {
+        'title': _first_text(tree, DETAIL_TITLE_SELECTOR),
+        'price_text': _first_text(tree, DETAIL_PRICE_SELECTOR),
+        'description': description,
+        'images': images,
+        'seller': seller,
+        'condition': condition
+    }
+
+# Per-item block of the bookmarks HTML report. Values are HTML-escaped by the
+# caller, since titles, sellers and URLs all come straight from the listing.
+BOOKMARK_ROW_TEMPLATE = Template("""
+                    <div class="item">
+                        <div class="title">$title</div>
+                        <div class="price">Price: ¥$price</div>
+                        <div class="details">
+                            <p>Condition: $condition</p>
+                            <p>Seller: $seller</p>
+                            <p>Card Details: $card_details</p>
+                        </div>
+                        <div class="links">
+                            <a href="$buyee_url" target="_blank">View on Buyee</a>
+                            $yahoo_link
+                        </div>
+                        $image
+                    </div>
+                    """)
+
+BOOKMARK_YAHOO_LINK_TEMPLATE = Template('<a href="$url" target="_blank">View on Yahoo Auctions</a>')
+
+BOOKMARK_IMAGE_TEMPLATE = Template('<img class="image" src="$src" alt="Card Image">')
+
+def render_bookmark_row(item: Dict[str, Any]) -> str:
+    """Render one bookmarked item as an HTML block for the bookmarks report."""
+    yahoo_link = BOOKMARK_YAHOO_LINK_TEMPLATE.substitute(
+        url=escape(item['yahoo_auction_url'])
+    ) if item['yahoo_auction_url'] else ''
+    image = BOOKMARK_IMAGE_TEMPLATE.substitute(
+        src=escape(item['images'][0])
+    ) if item['images'] else ''
+    return BOOKMARK_ROW_TEMPLATE.substitute(
+        title=escape(item['title']),
+        price=f"{item['price_yen']:,.0f}",
+        condition=escape(str(item['condition'])),
+        seller=escape(str(item['seller'])),
+        card_details=escape(json.dumps(item['card_details'], ensure_ascii=False)),
+        buyee_url=escape(item['buyee_url']),
+        yahoo_link=yahoo_link,
+        image=image
+    )
+
+def yahoo_auction_link(buyee_url: str) -> Tuple[Optional[str], Optional[str]]:
+    """Return the Yahoo Auctions ID and URL behind a Buyee item URL, or (None, None)."""
+    match = YAHOO_AUCTION_ID_PATTERN.search(buyee_url)
+    if not match:
+        return None, None
+    yahoo_auction_id = match.group(1)
+    return yahoo_auction_id, f"https://page.auctions.yahoo.co.jp/jp/auction/{yahoo_auction_id}"
+
+def write_bookmarks_html(path: str, search_term: str, bookmarks_data: List[Dict[str, Any]]) -> None:
+    """Write the bookmarks summary page for a search term."""
+    with open(path, 'wb', buffering=1 << 16) as f:
+        # Rows are encoded and written one at a time through a 64 KiB
+        # buffer, so the report is never held in memory as a whole and
+        # small rows don't each cost a write syscall
+        f.write(BOOKMARKS_HTML_HEAD)
+        f.write(f"""
+                    <h1>Bookmarked Items</h1>
+                    <p>Search Term: {escape(search_term)}</p>
+                    <p>Total Items: {len(bookmarks_data)}</p>
+                    <div class="items">
+                """.encode('utf-8'))
+        
+        f.writelines(render_bookmark_row(item).encode('utf-8') for item in bookmarks_data)
+        
+        f.write(BOOKMARKS_HTML_FOOT)
+
+def write_csv(path: str, rows: List[Dict[str, Any]]) -> None:
+    """Write dict rows to a CSV file, with columns in order of first appearance."""
+    fieldnames = list(dict.fromkeys(key for row in rows for key in row))
+    with open(path, 'w', newline='', encoding='utf-8', buffering=1 << 20) as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+
+def write_json(path: str, data: Any) -> None:
+    """Write data as indented UTF-8 JSON, using orjson's C encoder when it is installed."""
+    if orjson is not None:
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    else:
+        # json.dump() with indent uses the pure-Python encoder and issues one
+        # write per token; build the string once and write it in one go instead
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(data, ensure_ascii=False, indent=2))
+
+def _write_debug_file(path: str, content: str) -> None:
+    """Write a debug dump to disk; runs on the debug writer thread."""
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+    except Exception as e:
+        logger.error(f"Error writing debug file {path}: {str(e)}")
+
 class BuyeeScraper:
-    def __init__(self, output_dir: str = "scraped_results", max_pages: int = 5, headless: bool = True):
+    # Title keyword tables used by parse_card_details_from_buyee. Keywords are
+    # lower-case so they can be matched against the lower-cased title directly.
+    RARITY_KEYWORDS = {
+        'Secret Rare': ['secret rare', 'シークレットレア', 'sr'],
+        'Ultimate Rare': ['ultimate rare', 'アルティメットレア', 'ur'],
+        'Ghost Rare': ['ghost rare', 'ゴーストレア', 'gr'],
+        'Collector\'s Rare': ['collector\'s rare', 'コレクターズレア', 'cr'],
+        'Starlight Rare': ['starlight rare', 'スターライトレア', 'str'],
+        'Quarter Century Secret Rare': ['quarter century secret rare', 'クォーターセンチュリーシークレットレア', 'qcsr'],
+        'Prismatic Secret Rare': ['prismatic secret rare', 'プリズマティックシークレットレア', 'psr'],
+        'Platinum Secret Rare': ['platinum secret rare', 'プラチナシークレットレア', 'plsr'],
+        'Gold Secret Rare': ['gold secret rare', 'ゴールドシークレットレア', 'gsr'],
+        'Ultra Rare': ['ultra rare', 'ウルトラレア', 'ur'],
+        'Super Rare': ['super rare', 'スーパーレア', 'sr'],
+        'Rare': ['rare', 'レア', 'r'],
+        'Common': ['common', 'ノーマル', 'n']
+    }
+    
+    EDITION_KEYWORDS = {
+        '1st Edition': ['1st', 'first edition', '初版', '初刷'],
+        'Unlimited': ['unlimited', '無制限', '再版', '再刷']
+    }
+    
+    REGION_KEYWORDS = {
+        'Asia': ['asia', 'asian', 'アジア', 'アジア版'],
+        'English': ['english', '英', '英語版'],
+        'Japanese': ['japanese', '日', '日本語版'],
+        'Korean': ['korean', '韓', '韓国版']
+    }
+    
+    # One compiled alternation per label, so each label is a single scan of the title
+    RARITY_PATTERNS = _compile_keyword_table(RARITY_KEYWORDS)
+    EDITION_PATTERNS = _compile_keyword_table(EDITION_KEYWORDS)
+    REGION_PATTERNS = _compile_keyword_table(REGION_KEYWORDS)
+    
+    def __init__(self, output_dir: str = "scraped_results", max_pages: int = 5, headless: bool = True, debug: bool = False, max_price: Optional[float] = None):
         self.base_url = "https://buyee.jp"
         self.output_dir = output_dir
         self.max_pages = max_pages
         self.headless = headless
+        self.debug = debug
+        self.max_price = max_price
+        # Per-page debug dumps are only written in debug mode, off the scraping thread
+        self._debug_writer = ThreadPoolExecutor(max_workers=1) if debug else None
+        self.request_handler = RequestHandler()
         os.makedirs(self.output_dir, exist_ok=True)
         self.setup_driver()
 
@@ -71,6 +345,13 @@ class BuyeeScraper:
             sanitized = sanitized[:240]
         return sanitized
 
+    def save_debug_snapshot(self, filename: str, content: str) -> None:
+        """Queue a per-page debug dump when debug mode is enabled."""
+        if not self.debug:
+            return
+        path = os.path.join(self.output_dir, "debug", filename)
+        self._debug_writer.submit(_write_debug_file, path, content)
+
     def save_debug_info(self, identifier: str, error_type: str, page_source: str) -> None:
         """Save debug information about a failed request."""
         try:
@@ -91,6 +372,10 @@ class BuyeeScraper:
         except Exception as e:
             logger.error(f"Error saving debug info: {str(e)}")
 
+    def wait(self, timeout: float) -> WebDriverWait:
+        """Return an explicit wait that polls faster than Selenium's 500ms default."""
+        return WebDriverWait(self.driver, timeout, poll_frequency=WAIT_POLL_FREQUENCY)
+
     def setup_driver(self):
         """Set up and return a configured Chrome WebDriver instance."""
         try:
@@ -203,7 +488,8 @@ class BuyeeScraper:
             logger.error(f"Connection test failed: {str(e)}")
             return False
 
-    def clean_price(self, price_text: str) -> float:
+    @staticmethod
+    def clean_price(price_text: str) -> float:
         """Clean and convert price text to float."""
         try:
             # Remove currency symbols, commas, and convert to float
@@ -293,7 +579,7 @@ class BuyeeScraper:
             # Check for essential page elements with explicit waits
             try:
                 # First, wait for the page to be in a stable state
-                WebDriverWait(self.driver, 10).until(
+                self.wait(10).until(
                     lambda driver: driver.execute_script('return document.readyState') == 'complete'
                 )
                 
@@ -308,7 +594,7 @@ class BuyeeScraper:
                 # Try to find the item container with the correct selector
                 try:
                     logger.info(f"Waiting for item container: {analysis['item_analysis']['container_selector']}")
-                    item_container = WebDriverWait(self.driver, 20).until(
+                    item_container = self.wait(20).until(
                         EC.presence_of_element_located((By.CSS_SELECTOR, analysis['item_analysis']['item_selector']))
                     )
                     analysis["has_item_container"] = True
@@ -319,7 +605,7 @@ class BuyeeScraper:
                     logger.info(f"Waiting for item cards: {analysis['item_analysis']['item_selector']}")
                     try:
                         # Wait for at least one item to be present
-                        WebDriverWait(self.driver, 10).until(
+                        self.wait(10).until(
                             EC.presence_of_element_located((By.CSS_SELECTOR, analysis['item_analysis']['item_selector']))
                         )
                         
@@ -523,7 +809,7 @@ class BuyeeScraper:
             # Check for essential elements
             try:
                 # First, wait for the page to be in a stable state
-                WebDriverWait(self.driver, 10).until(
+                self.wait(10).until(
                     lambda driver: driver.execute_script('return document.readyState') == 'complete'
                 )
                 
@@ -590,7 +876,7 @@ class BuyeeScraper:
                 # Try to find the item container with the correct selector
                 try:
                     logger.info("Waiting for item container: ul.auctionSearchResult.list_layout")
-                    item_container = WebDriverWait(self.driver, 20).until(
+                    item_container = self.wait(20).until(
                         EC.presence_of_element_located((By.CSS_SELECTOR, "ul.auctionSearchResult.list_layout"))
                     )
                     analysis['has_item_container'] = True
@@ -746,13 +1032,13 @@ class BuyeeScraper:
         """Wait for the page to be in a ready state with improved reliability."""
         try:
             # Wait for document.readyState to be 'complete'
-            WebDriverWait(self.driver, timeout).until(
+            self.wait(timeout).until(
                 lambda driver: driver.execute_script('return document.readyState') == 'complete'
             )
             
             # Wait for jQuery to be ready (if present)
             try:
-                WebDriverWait(self.driver, 5).until(
+                self.wait(5).until(
                     lambda driver: driver.execute_script('return jQuery.active') == 0
                 )
             except:
@@ -769,7 +1055,7 @@ class BuyeeScraper:
             
             for selector in loading_selectors:
                 try:
-                    WebDriverWait(self.driver, 5).until_not(
+                    self.wait(5).until_not(
                         EC.presence_of_element_located((By.CSS_SELECTOR, selector))
                     )
                 except:
@@ -802,7 +1088,7 @@ class BuyeeScraper:
             
             for selector in main_content_selectors:
                 try:
-                    WebDriverWait(self.driver, 5).until(
+                    self.wait(5).until(
                         EC.presence_of_element_located((By.CSS_SELECTOR, selector))
                     )
                     return True
@@ -863,7 +1149,7 @@ class BuyeeScraper:
             for selector in cookie_selectors:
                 try:
                     # Wait for button to be clickable
-                    cookie_button = WebDriverWait(self.driver, 3).until(
+                    cookie_button = self.wait(3).until(
                         EC.element_to_be_clickable((By.CSS_SELECTOR, selector))
                     )
                     
@@ -910,9 +1196,7 @@ class BuyeeScraper:
             leads_data = []
             for summary in item_summaries:
                 # Extract Yahoo Auction ID from Buyee URL
-                yahoo_id_match = re.search(r'/([a-z]\d+)(?:\?|$)', summary['url'])
-                yahoo_auction_id = yahoo_id_match.group(1) if yahoo_id_match else None
-                yahoo_auction_url = f"https://page.auctions.yahoo.co.jp/jp/auction/{yahoo_auction_id}" if yahoo_auction_id else None
+                yahoo_auction_id, yahoo_auction_url = yahoo_auction_link(summary['url'])
                 
                 lead_info = {
                     'title': summary['title'],
@@ -928,15 +1212,13 @@ class BuyeeScraper:
                 leads_data.append(lead_info)
             
             # Save as CSV
-            df = pd.DataFrame(leads_data)
             csv_path = os.path.join(self.output_dir, f"{base_filename}.csv")
-            df.to_csv(csv_path, index=False, encoding='utf-8')
+            write_csv(csv_path, leads_data)
             logger.info(f"Saved {len(leads_data)} initial promising leads to {csv_path}")
             
             # Save as JSON
             json_path = os.path.join(self.output_dir, f"{base_filename}.json")
-            with open(json_path, 'w', encoding='utf-8') as f:
-                json.dump(leads_data, f, ensure_ascii=False, indent=2)
+            write_json(json_path, leads_data)
             logger.info(f"Saved {len(leads_data)} initial promising leads to {json_path}")
             
         except Exception as e:
@@ -999,6 +1281,11 @@ class BuyeeScraper:
                     logger.warning(f"No items found on page {page}")
                     break
                 
+                # Detail pages are static HTML, so fetch them concurrently up front
+                # and only fall back to the browser for pages that fail
+                detail_pages = self.fetch_detail_pages([summary['url'] for summary in item_summaries])
+                parsed_pages = self.parse_detail_pages(detail_pages)
+                
                 # Process each item
                 for summary in item_summaries:
                     try:
@@ -1008,7 +1295,9 @@ class BuyeeScraper:
                             break
                         
                         # Get detailed information
-                        detailed_info = self.scrape_item_detail_page(summary['url'])
+                        detailed_info = parsed_pages.get(summary['url'])
+                        if not detailed_info:
+                            detailed_info = self.scrape_item_detail_page(summary['url'])
                         if not detailed_info:
                             continue
                         
@@ -1060,6 +1349,66 @@ class BuyeeScraper:
             logger.error(traceback.format_exc())
             return []
 
+    @classmethod
+    def build_item_data(cls, url: str, html: str) -> Optional[Dict[str, Any]]:
+        """Build an item record from a detail page's HTML, or None if title/price are missing."""
+        fields = parse_detail_fields(html, url)
+        if not fields['title'] or fields['price_text'] is None:
+            return None
+        
+        title = fields['title']
+        description = fields['description']
+        
+        return {
+            'url': url,
+            'title': title,
+            'price': cls.clean_price(fields['price_text']),
+            'description': description,
+            'images': fields['images'],
+            'seller': fields['seller'],
+            'condition': fields['condition'],
+            'card_details': cls.parse_card_details_from_buyee(title, description),
+            'scraped_at': datetime.now().isoformat()
+        }
+
+    def fetch_detail_pages(self, urls: List[str]) -> Dict[str, str]:
+        """Fetch detail page HTML over plain HTTP, several pages at a time."""
+        # Reuse the browser's cookies so the HTTP session sees the same site state
+        try:
+            for cookie in self.driver.get_cookies():
+                self.request_handler.session.cookies.set(
+                    cookie['name'], cookie['value'], domain=cookie.get('domain')
+                )
+        except WebDriverException as e:
+            logger.warning(f"Could not copy browser cookies: {str(e)}")
+        
+        pages = {}
+        with ThreadPoolExecutor(max_workers=DETAIL_FETCH_WORKERS) as executor:
+            # A blocked page goes straight to the browser fallback instead of
+            # through the HTTP retry and backoff cycle
+            fetch = partial(self.request_handler.get_page, retry_blocked=False)
+            for url, html in zip(urls, executor.map(fetch, urls)):
+                if html:
+                    pages[url] = html
+        
+        logger.info(f"Fetched {len(pages)}/{len(urls)} detail pages over HTTP")
+        return pages
+
+    def parse_detail_pages(self, pages: Dict[str, str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Parse fetched detail pages, spreading large batches across CPU cores."""
+        items = list(pages.items())
+        if len(items) < PARALLEL_PARSE_MIN_PAGES:
+            results = map(_parse_detail_worker, items)
+            return dict(zip(pages, results))
+        
+        try:
+            with ProcessPoolExecutor() as executor:
+                results = list(executor.map(_parse_detail_worker, items, chunksize=8))
+            return dict(zip(pages, results))
+        except Exception as e:
+            logger.warning(f"Parallel parsing failed, parsing serially: {str(e)}")
+            return dict(zip(pages, map(_parse_detail_worker, items)))
+
     def scrape_item_detail_page(self, url):
         """Scrape detailed information from an item's page with improved reliability."""
         max_retries = 3
@@ -1082,77 +1431,25 @@ class BuyeeScraper:
                 self.handle_cookie_popup()
                 
                 # Wait for main content to be visible
-                WebDriverWait(self.driver, 20).until(
+                self.wait(20).until(
                     EC.presence_of_element_located((By.CSS_SELECTOR, "div.itemDetail"))
                 )
                 
-                # Extract basic information with explicit waits
-                title = WebDriverWait(self.driver, 10).until(
+                # Wait only for the fields we cannot do without, then read every
+                # field from a single page_source snapshot. Optional fields used to
+                # cost a 10 second explicit wait each when they were missing.
+                self.wait(10).until(
                     EC.presence_of_element_located((By.CSS_SELECTOR, "h1.itemName"))
-                ).text.strip()
-                
-                price_element = WebDriverWait(self.driver, 10).until(
+                )
+                self.wait(10).until(
                     EC.presence_of_element_located((By.CSS_SELECTOR, "span.price"))
                 )
-                price = self.clean_price(price_element.text)
                 
-                # Extract description with fallback
-                try:
-                    description_element = WebDriverWait(self.driver, 10).until(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, "div.itemDescription"))
-                    )
-                    description = description_element.text.strip()
-                except TimeoutException:
-                    description = "No description available"
-                    logger.warning(f"No description found for item: {url}")
-                
-                # Extract images with retry logic
-                images = []
-                try:
-                    image_elements = WebDriverWait(self.driver, 10).until(
-                        EC.presence_of_all_elements_located((By.CSS_SELECTOR, "div.itemImage img"))
-                    )
-                    images = [img.get_attribute('src') for img in image_elements if img.get_attribute('src')]
-                except TimeoutException:
-                    logger.warning(f"No images found for item: {url}")
-                
-                # Extract seller information
-                try:
-                    seller_element = WebDriverWait(self.driver, 10).until(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, "div.sellerName"))
-                    )
-                    seller = seller_element.text.strip()
-                except TimeoutException:
-                    seller = "Unknown"
-                    logger.warning(f"No seller information found for item: {url}")
-                
-                # Extract condition information
-                try:
-                    condition_element = WebDriverWait(self.driver, 10).until(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, "div.itemCondition"))
-                    )
-                    condition = condition_element.text.strip()
-                except TimeoutException:
-                    condition = "Unknown"
-                    logger.warning(f"No condition information found for item: {url}")
+                item_data = self.build_item_data(url, self.driver.page_source)
+                if not item_data:
+                    raise TimeoutException("Title or price missing from page source")
                 
-                # Parse card details
-                card_details = self.parse_card_details_from_buyee(title, description)
-                
-                # Combine all information
-                item_data = {
-                    'url': url,
-                    'title': title,
-                    'price': price,
-                    'description': description,
-                    'images': images,
-                    'seller': seller,
-                    'condition': condition,
-                    'card_details': card_details,
-                    'scraped_at': datetime.now().isoformat()
-                }
-                
-                logger.info(f"Successfully scraped item: {title}")
+                logger.info(f"Successfully scraped item: {item_data['title']}")
                 return item_data
                 
             except TimeoutException as e:
@@ -1185,8 +1482,6 @@ class BuyeeScraper:
     def get_item_summaries_from_search_page(self, page_number: int = 1) -> List[Dict]:
         """Extract item summaries from the current search results page."""
         summaries = []
-        debug_dir = os.path.join(self.output_dir, "debug")
-        os.makedirs(debug_dir, exist_ok=True)
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         
         try:
@@ -1198,8 +1493,8 @@ class BuyeeScraper:
                 return []
             
             # Save initial page state for debugging
-            with open(os.path.join(debug_dir, f"search_page_initial_{timestamp}.html"), 'w', encoding='utf-8') as f:
-                f.write(self.driver.page_source)
+            if self.debug:
+                self.save_debug_snapshot(f"search_page_initial_{timestamp}.html", self.driver.page_source)
             
             # Try multiple selectors for item cards
             item_card_selectors = [
@@ -1216,7 +1511,7 @@ class BuyeeScraper:
             for selector in item_card_selectors:
                 try:
                     logger.info(f"Attempting to find item cards with selector: '{selector}'")
-                    card_elements = WebDriverWait(self.driver, 15).until(
+                    card_elements = self.wait(15).until(
                         EC.presence_of_all_elements_located((By.CSS_SELECTOR, selector))
                     )
                     if card_elements:
@@ -1238,72 +1533,60 @@ class BuyeeScraper:
             # Process each card with robust error handling
             for i, card in enumerate(card_elements):
                 try:
-                    # Try multiple selectors for each element
-                    title_selectors = [
-                        "h3[data-testid='item-card-title']",
-                        "div.itemCard__itemName a",
-                        "div.item-title a",
-                        "a.item-title"
-                    ]
+                    # Parse the card markup once and try the fallback selectors
+                    # locally, instead of one WebDriver round trip (and a
+                    # NoSuchElementException) per selector that misses
+                    card_tree = lxml.html.fromstring(card.get_attribute('outerHTML'), parser=HTML_PARSER)
                     
-                    price_selectors = [
-                        "span[data-testid='item-card-price']",
-                        "div.g-priceDetails span.g-price",
-                        "div.item-price",
-                        "span.price"
-                    ]
+                    # Extract price
+                    price_text = None
+                    for selector in CARD_PRICE_SELECTORS:
+                        matches = selector(card_tree)
+                        if not matches:
+                            continue
+                        price_text = matches[0].text_content().strip()
+                        if price_text:
+                            break
+                    
+                    if not price_text:
+                        logger.warning(f"Could not extract price for card {i+1}")
+                        continue
+                    
+                    price_yen = self.clean_price(price_text)
+                    
+                    # Cheapest gate first: skip over-budget listings before
+                    # reading the title or running any keyword analysis
+                    if self.max_price is not None and price_yen > self.max_price:
+                        logger.debug(f"Skipping card {i+1}: {price_yen} yen is above max price")
+                        continue
                     
                     # Extract title and URL
                     title = None
                     url = None
-                    for selector in title_selectors:
-                        try:
-                            title_element = card.find_element(By.CSS_SELECTOR, selector)
-                            title = title_element.text.strip()
-                            url = title_element.get_attribute('href')
-                            if title and url:
-                                break
-                        except NoSuchElementException:
+                    for selector in CARD_TITLE_SELECTORS:
+                        matches = selector(card_tree)
+                        if not matches:
                             continue
+                        title = matches[0].text_content().strip()
+                        url = matches[0].get('href')
+                        if title and url:
+                            url = urljoin(self.base_url, url)
+                            break
                     
                     if not title or not url:
                         logger.warning(f"Could not extract title/URL for card {i+1}")
                         continue
                     
-                    # Extract price
-                    price_text = None
-                    for selector in price_selectors:
-                        try:
-                            price_element = card.find_element(By.CSS_SELECTOR, selector)
-                            price_text = price_element.text.strip()
-                            if price_text:
-                                break
-                        except NoSuchElementException:
-                            continue
-                    
-                    if not price_text:
-                        logger.warning(f"Could not extract price for card {i+1}: {title}")
-                        continue
-                    
-                    price_yen = self.clean_price(price_text)
-                    
                     # Extract thumbnail URL
                     thumbnail_url = None
-                    thumbnail_selectors = [
-                        "img[data-testid='item-card-image']",
-                        "div.itemCard__image img",
-                        "div.item-image img",
-                        "img.item-image"
-                    ]
-                    
-                    for selector in thumbnail_selectors:
-                        try:
-                            img_element = card.find_element(By.CSS_SELECTOR, selector)
-                            thumbnail_url = img_element.get_attribute('src') or img_element.get_attribute('data-src')
-                            if thumbnail_url:
-                                break
-                        except NoSuchElementException:
+                    for selector in CARD_THUMBNAIL_SELECTORS:
+                        matches = selector(card_tree)
+                        if not matches:
                             continue
+                        thumbnail_url = matches[0].get('src') or matches[0].get('data-src')
+                        if thumbnail_url:
+                            thumbnail_url = urljoin(self.base_url, thumbnail_url)
+                            break
                     
                     # Log basic info
                     logger.info(f"Item {i+1}/{len(card_elements)}:")
@@ -1371,7 +1654,7 @@ class BuyeeScraper:
                     continue
             
             # Save successful scrape info
-            if summaries:
+            if summaries and self.debug:
                 success_info = {
                     'timestamp': timestamp,
                     'page_number': page_number,
@@ -1379,9 +1662,10 @@ class BuyeeScraper:
                     'promising_items': len(summaries),
                     'used_selector': used_selector
                 }
-                success_path = os.path.join(debug_dir, f"search_page_success_{timestamp}.json")
-                with open(success_path, 'w', encoding='utf-8') as f:
-                    json.dump(success_info, f, ensure_ascii=False, indent=2)
+                self.save_debug_snapshot(
+                    f"search_page_success_{timestamp}.json",
+                    json.dumps(success_info, ensure_ascii=False, indent=2)
+                )
             
             return summaries
             
@@ -1402,15 +1686,13 @@ class BuyeeScraper:
             base_filename = f"buyee_listings_{search_term}_{timestamp}"
             
             # Save as CSV
-            df = pd.DataFrame(results)
             csv_path = os.path.join(self.output_dir, f"{base_filename}.csv")
-            df.to_csv(csv_path, index=False, encoding='utf-8')
+            write_csv(csv_path, results)
             logger.info(f"Saved {len(results)} results to {csv_path}")
             
             # Save as JSON
             json_path = os.path.join(self.output_dir, f"{base_filename}.json")
-            with open(json_path, 'w', encoding='utf-8') as f:
-                json.dump(results, f, ensure_ascii=False, indent=2)
+            write_json(json_path, results)
             logger.info(f"Saved {len(results)} results to {json_path}")
             
         except Exception as e:
@@ -1424,8 +1706,60 @@ class BuyeeScraper:
             logger.info("WebDriver closed successfully")
         except Exception as e:
             logger.error(f"Error closing WebDriver: {str(e)}")
+        if self._debug_writer:
+            # Let any queued debug dumps finish before exiting
+            self._debug_writer.shutdown(wait=True)
 
-    def parse_card_details_from_buyee(self, title: str, description: str) -> Dict[str, Any]:
+    @classmethod
+    @lru_cache(maxsize=4096)
+    def _analyze_title(cls, title: str) -> Dict[str, Optional[str]]:
+        """Detect set code, card number, rarity, edition and language from a listing title.
+        
+        The result is cached and shared between callers, so it must not be mutated.
+        """
+        details = {
+            'set_code': None,
+            'card_number': None,
+            'rarity': None,
+            'edition': None,
+            'language': None
+        }
+        
+        # Lower-case the title once; the keyword tables below are already lower-case
+        title_lower = title.lower()
+        
+        # Extract set code and card number
+        set_code_match = SET_CODE_PATTERN.search(title)
+        if set_code_match:
+            details['set_code'] = set_code_match.group(1)
+            details['card_number'] = set_code_match.group(3)
+            logger.debug(f"Found set code: {details['set_code']}, card number: {details['card_number']}")
+        
+        # Extract rarity
+        for rarity, pattern in cls.RARITY_PATTERNS:
+            if pattern.search(title_lower):
+                details['rarity'] = rarity
+                logger.debug(f"Found rarity: {rarity}")
+                break
+        
+        # Extract edition
+        for edition, pattern in cls.EDITION_PATTERNS:
+            if pattern.search(title_lower):
+                details['edition'] = edition
+                logger.debug(f"Found edition: {edition}")
+                break
+        
+        # Extract language/region
+        for region, pattern in cls.REGION_PATTERNS:
+            if pattern.search(title_lower):
+                details['language'] = region
+                logger.debug(f"Found language/region: {region}")
+                break
+        
+        return details
+
+    @classmethod
+    def parse_card_details_from_buyee(cls, title: str, description: str) -> Dict[str, Any]:
         """
         Parse card details from Buyee listing title and description.
         Returns a dictionary containing structured card information.
@@ -1444,70 +1778,18 @@ class BuyeeScraper:
         try:
             # Extract rank from description
             if description:
-                rank_match = re.search(r'【ランク】\s*([A-Z]+)', description)
+                rank_match = RANK_PATTERN.search(description)
                 if rank_match:
                     details['rank'] = rank_match.group(1)
                     logger.debug(f"Found rank: {details['rank']}")
             
-            # Extract set code and card number
-            set_code_match = re.search(r'([A-Z]{2,4})-([A-Z]{2})(\d{3})', title)
-            if set_code_match:
-                details['set_code'] = set_code_match.group(1)
-                details['card_number'] = set_code_match.group(3)
-                logger.debug(f"Found set code: {details['set_code']}, card number: {details['card_number']}")
-            
-            # Extract rarity
-            rarity_keywords = {
-                'Secret Rare': ['secret rare', 'シークレットレア', 'sr'],
-                'Ultimate Rare': ['ultimate rare', 'アルティメットレア', 'ur'],
-                'Ghost Rare': ['ghost rare', 'ゴーストレア', 'gr'],
-                'Collector\'s Rare': ['collector\'s rare', 'コレクターズレア', 'cr'],
-                'Starlight Rare': ['starlight rare', 'スターライトレア', 'str'],
-                'Quarter Century Secret Rare': ['quarter century secret rare', 'クォーターセンチュリーシークレットレア', 'qcsr'],
-                'Prismatic Secret Rare': ['prismatic secret rare', 'プリズマティックシークレットレア', 'psr'],
-                'Platinum Secret Rare': ['platinum secret rare', 'プラチナシークレットレア', 'plsr'],
-                'Gold Secret Rare': ['gold secret rare', 'ゴールドシークレットレア', 'gsr'],
-                'Ultra Rare': ['ultra rare', 'ウルトラレア', 'ur'],
-                'Super Rare': ['super rare', 'スーパーレア', 'sr'],
-                'Rare': ['rare', 'レア', 'r'],
-                'Common': ['common', 'ノーマル', 'n']
-            }
-            
-            for rarity, keywords in rarity_keywords.items():
-                if any(keyword.lower() in title.lower() for keyword in keywords):
-                    details['rarity'] = rarity
-                    logger.debug(f"Found rarity: {rarity}")
-                    break
-            
-            # Extract edition
-            edition_keywords = {
-                '1st Edition': ['1st', 'first edition', '初版', '初刷'],
-                'Unlimited': ['unlimited', '無制限', '再版', '再刷']
-            }
-            
-            for edition, keywords in edition_keywords.items():
-                if any(keyword.lower() in title.lower() for keyword in keywords):
-                    details['edition'] = edition
-                    logger.debug(f"Found edition: {edition}")
-                    break
-            
-            # Extract language/region
-            region_keywords = {
-                'Asia': ['asia', 'asian', 'アジア', 'アジア版'],
-                'English': ['english', '英', '英語版'],
-                'Japanese': ['japanese', '日', '日本語版'],
-                'Korean': ['korean', '韓', '韓国版']
-            }
-            
-            for region, keywords in region_keywords.items():
-                if any(keyword.lower() in title.lower() for keyword in keywords):
-                    details['language'] = region
-                    logger.debug(f"Found language/region: {region}")
-                    break
+            # Title-only fields are cached, since the same title is often seen
+            # again across overlapping pages, re-scrapes and browser fallbacks
+            details.update(cls._analyze_title(title))
             
             # Extract condition text from description
             if description:
-                condition_section = re.search(r'【商品の状態】\s*(.*?)(?=\n|$)', description)
+                condition_section = CONDITION_SECTION_PATTERN.search(description)
                 if condition_section:
                     details['condition_text'] = condition_section.group(1).strip()
                     logger.debug(f"Found condition text: {details['condition_text']}")
@@ -1559,9 +1841,7 @@ class BuyeeScraper:
             bookmarks_data = []
             for item in items:
                 # Extract Yahoo Auction ID from Buyee URL
-                yahoo_id_match = re.search(r'/([a-z]\d+)(?:\?|$)', item['url'])
-                yahoo_auction_id = yahoo_id_match.group(1) if yahoo_id_match else None
-                yahoo_auction_url = f"https://page.auctions.yahoo.co.jp/jp/auction/{yahoo_auction_id}" if yahoo_auction_id else None
+                yahoo_auction_id, yahoo_auction_url = yahoo_auction_link(item['url'])
                 
                 bookmark_info = {
                     'title': item['title'],
@@ -1578,80 +1858,43 @@ class BuyeeScraper:
                 }
                 bookmarks_data.append(bookmark_info)
             
-            # Save as CSV
-            df = pd.DataFrame(bookmarks_data)
-            csv_path = os.path.join(bookmarks_dir, f"bookmarks_{search_term}_{timestamp}.csv")
-            df.to_csv(csv_path, index=False, encoding='utf-8')
-            logger.info(f"Saved {len(bookmarks_data)} bookmarked items to {csv_path}")
-            
-            # Save as JSON
-            json_path = os.path.join(bookmarks_dir, f"bookmarks_{search_term}_{timestamp}.json")
-            with open(json_path, 'w', encoding='utf-8') as f:
-                json.dump(bookmarks_data, f, ensure_ascii=False, indent=2)
-            logger.info(f"Saved {len(bookmarks_data)} bookmarked items to {json_path}")
-            
-            # Create a summary HTML file for easy viewing
-            html_path = os.path.join(bookmarks_dir, f"bookmarks_{search_term}_{timestamp}.html")
-            with open(html_path, 'w', encoding='utf-8') as f:
-                f.write("""
-                <!DOCTYPE html>
-                <html>
-                <head>
-                    <title>Bookmarked Items</title>
-                    <style>
-                        body { font-family: Arial, sans-serif; margin: 20px; }
-                        .item { border: 1px solid #ddd; margin: 10px 0; padding: 15px; border-radius: 5px; }
-                        .item:hover { background-color: #f5f5f5; }
-                        .title { font-size: 1.2em; font-weight: bold; margin-bottom: 10px; }
-                        .price { color: #e44d26; font-weight: bold; }
-                        .details { margin: 10px 0; }
-                        .image { max-width: 200px; margin: 10px 0; }
-                        .links { margin-top: 10px; }
-                        .links a { margin-right: 15px; }
-                    </style>
-                </head>
-                <body>
-                    <h1>Bookmarked Items</h1>
-                    <p>Search Term: {search_term}</p>
-                    <p>Total Items: {len(bookmarks_data)}</p>
-                    <div class="items">
-                """.format(search_term=search_term, len=len(bookmarks_data)))
-                
-                for item in bookmarks_data:
-                    f.write(f"""
-                    <div class="item">
-                        <div class="title">{item['title']}</div>
-                        <div class="price">Price: ¥{item['price_yen']:,.0f}</div>
-                        <div class="details">
-                            <p>Condition: {item['condition']}</p>
-                            <p>Seller: {item['seller']}</p>
-                            <p>Card Details: {json.dumps(item['card_details'], ensure_ascii=False)}</p>
-                        </div>
-                        <div class="links">
-                            <a href="{item['buyee_url']}" target="_blank">View on Buyee</a>
-                            {f'<a href="{item["yahoo_auction_url"]}" target="_blank">View on Yahoo Auctions</a>' if item['yahoo_auction_url'] else ''}
-                        </div>
-                        {f'<img class="image" src="{item["images"][0]}" alt="Card Image">' if item['images'] else ''}
-                    </div>
-                    """)
-                
-                f.write("""
-                    </div>
-                </body>
-                </html>
-                """)
-            
-            logger.info(f"Created HTML summary at {html_path}")
+            base_path = os.path.join(bookmarks_dir, f"bookmarks_{search_term}_{timestamp}")
+            csv_path = f"{base_path}.csv"
+            json_path = f"{base_path}.json"
+            html_path = f"{base_path}.html"
+            
+            # Save as CSV, JSON and a summary HTML file for easy viewing. The
+            # three files are independent, so write them concurrently.
+            with ThreadPoolExecutor(max_workers=3) as executor:
+                futures = {
+                    executor.submit(write_csv, csv_path, bookmarks_data): csv_path,
+                    executor.submit(write_json, json_path, bookmarks_data): json_path,
+                    executor.submit(write_bookmarks_html, html_path, search_term, bookmarks_data): html_path
+                }
+                for future, path in futures.items():
+                    future.result()
+                    logger.info(f"Saved {len(bookmarks_data)} bookmarked items to {path}")
             
         except Exception as e:
             logger.error(f"Error saving bookmarked items: {str(e)}")
             logger.error(traceback.format_exc())
 
+def _parse_detail_worker(page: Tuple[str, str]) -> Optional[Dict[str, Any]]:
+    """Parse one (url, html) pair; module-level so worker processes can pickle it."""
+    url, html = page
+    try:
+        return BuyeeScraper.build_item_data(url, html)
+    except Exception as e:
+        logger.error(f"Error parsing detail page {url}: {str(e)}")
+        return None
+
 def main():
     parser = argparse.ArgumentParser(description='Scrape Buyee for Yu-Gi-Oh cards')
     parser.add_argument('--output-dir', default='scraped_results', help='Directory to save results')
     parser.add_argument('--max-pages', type=int, default=5, help='Maximum pages to scrape per search')
     parser.add_argument('--headless', action='store_true', help='Run in headless mode')
+    parser.add_argument('--max-price', type=float, default=None, help='Skip listings priced above this many yen')
+    parser.add_argument('--debug', action='store_true', help='Save per-page HTML snapshots for debugging')
     args = parser.parse_args()
     
     scraper = None
@@ -1659,7 +1902,9 @@ def main():
         scraper = BuyeeScraper(
             output_dir=args.output_dir,
             max_pages=args.max_pages,
-            headless=args.headless
+            headless=args.headless,
+            debug=args.debug,
+            max_price=args.max_price
         )
         
         # Test connection first
@@ -3,6 +3,7 @@ import re
 import logging
 from dataclasses import dataclass
 from enum import Enum
+from src.keyword_scanner import KeywordScanner, keyword_ranks
 
 logger = logging.getLogger(__name__)
 
@@ -19,6 +20,10 @@ class CardCondition(Enum):
 
 @dataclass
 class CardInfo:
+    # One instance per listing; slots skip the per-instance __dict__
+    __slots__ = ('title', 'price', 'url', 'image_url', 'condition', 'is_valuable', 'rarity',
+                 'set_code', 'card_number', 'edition', 'region', 'confidence_score')
+    
     title: str
     price: float
     url: str
@@ -34,13 +39,6 @@ class CardInfo:
 
 class CardAnalyzer:
     def __init__(self):
-        # Value indicators for card analysis
-        self.value_indicators = {
-            'rarity': ['secret', 'ultimate', 'collector', 'gold', 'platinum', 'prismatic'],
-            'condition': ['mint', 'nm', 'ex', 'vg'],
-            'set': ['lob', 'sdj', 'sdy', 'sdk', 'mfc', 'crv', 'rymp']
-        }
-        
         # Condition keywords in Japanese and English
         self.condition_keywords = {
             CardCondition.MINT: [
@@ -123,11 +121,9 @@ class CardAnalyzer:
             "Dark Armed Dragon": ["PTDN", "RYMP"],
             "Destiny HERO - Disk Commander": ["DP05", "RYMP"],
             "Elemental HERO Air Neos": ["POTD", "RYMP"],
-            "Elemental HERO Stratos": ["DP03", "RYMP"],
             "Gladiator Beast Gyzarus": ["GLAS", "RYMP"],
             "Goyo Guardian": ["TDGS", "RYMP"],
             "Honest": ["LODT", "RYMP"],
-            "Judgment Dragon": ["LODT", "RYMP"],
             "Mezuki": ["CSOC", "RYMP"],
             "Plaguespreader Zombie": ["CSOC", "RYMP"],
             "Stardust Dragon": ["TDGS", "RYMP"],
@@ -137,6 +133,9 @@ class CardAnalyzer:
         # Set code patterns
         self.set_code_pattern = re.compile(r'([A-Z]{2,4})-([A-Z]{2})(\d{3})')
         
+        # Everything that isn't part of a number, stripped from price text
+        self.price_pattern = re.compile(r'[^\d.]')
+        
         # Edition keywords
         self.edition_keywords = {
             "1st Edition": ["1st", "first edition", "初版", "初刷"],
@@ -150,29 +149,75 @@ class CardAnalyzer:
             "Japanese": ["japanese", "日", "日本語版"],
             "Korean": ["korean", "韓", "韓国版"]
         }
+        
+        # Keyword groups that mark a listing as worth a closer look
+        self.high_rarities = ["Secret Rare", "Ultimate Rare", "Ghost Rare", "Collector's Rare", "Starlight Rare"]
+        self.sealed_keywords = ["sealed", "未開封", "新品未開封"]
+        self.event_keywords = ["tournament", "event", "championship", "大会", "イベント"]
+        self.special_keywords = ["special", "limited", "promo", "限定", "特典"]
+        
+        # Every keyword group above, compiled into one scanner so a title is read once
+        keyword_groups = [
+            list(self.valuable_cards), self.high_rarities,
+            self.sealed_keywords, self.event_keywords, self.special_keywords
+        ]
+        for table in (self.condition_keywords, self.rarity_keywords,
+                      self.edition_keywords, self.region_keywords):
+            keyword_groups.extend(table.values())
+        self.keyword_scanner = KeywordScanner(
+            keyword.lower() for keywords in keyword_groups for keyword in keywords
+        )
+        
+        # Flat lookups for the label tables: a tuple of labels in priority order
+        # and a keyword -> label index map, so only the keywords actually found
+        # are looked at instead of walking every label's keyword list
+        self.condition_labels, self.condition_ranks = keyword_ranks(self.condition_keywords)
+        self.rarity_labels, self.rarity_ranks = keyword_ranks(self.rarity_keywords)
+        self.edition_labels, self.edition_ranks = keyword_ranks(self.edition_keywords)
+        self.region_labels, self.region_ranks = keyword_ranks(self.region_keywords)
+        
+        # Lower-cased frozensets for the value checks
+        self.valuable_card_sets = tuple(
+            (card_name, card_name.lower(), frozenset(valid_sets))
+            for card_name, valid_sets in self.valuable_cards.items()
+        )
+        self.high_rarity_set = frozenset(rarity.lower() for rarity in self.high_rarities)
+        self.sealed_set = frozenset(self.sealed_keywords)
+        self.event_set = frozenset(self.event_keywords)
+        self.special_set = frozenset(self.special_keywords)
+
+    def _first_label(self, found: set, labels: tuple, ranks: Dict[str, int]) -> Optional[Any]:
+        """Return the highest-priority label with a keyword in found, or None."""
+        matched = [ranks[keyword] for keyword in found if keyword in ranks]
+        return labels[min(matched)] if matched else None
 
     def analyze_card(self, item_data: Dict[str, Any]) -> CardInfo:
         """Analyze a card listing and return detailed information."""
-        title = item_data.get('title', '').lower()
+        title = item_data.get('title', '')
         price = self._extract_price(item_data.get('price', '0'))
         
+        # Lower-case the title once and scan it for every known keyword in a
+        # single pass; the helpers below only look at the result
+        found = self.keyword_scanner.find(title.lower())
+        
         # Extract condition
-        condition = self._determine_condition(title)
+        condition = self._determine_condition(found)
         
         # Extract rarity
-        rarity = self._determine_rarity(title)
+        rarity = self._determine_rarity(found)
         
-        # Extract set code and card number
+        # Extract set code and card number (set codes are upper-case, so this
+        # needs the original title)
         set_code, card_number = self._extract_set_info(title)
         
         # Extract edition
-        edition = self._determine_edition(title)
+        edition = self._determine_edition(found)
         
         # Extract region
-        region = self._determine_region(title)
+        region = self._determine_region(found)
         
         # Check if card is valuable
-        is_valuable = self._is_valuable_card(title, set_code)
+        is_valuable = self._is_valuable_card(title, found, set_code, edition)
         
         # Calculate confidence score
         confidence_score = self._calculate_confidence_score(
@@ -180,7 +225,7 @@ class CardAnalyzer:
         )
         
         return CardInfo(
-            title=item_data.get('title', ''),
+            title=title,
             price=price,
             url=item_data.get('url', ''),
             image_url=item_data.get('image_url'),
@@ -194,28 +239,32 @@ class CardAnalyzer:
             confidence_score=confidence_score
         )
 
+    def valuable_card_matches(self, title: str, set_code: Optional[str]) -> Tuple[List[str], List[str]]:
+        """Return the known valuable cards named in the title, and those of them printed in set_code."""
+        found = self.keyword_scanner.find(title.lower())
+        name_matches = [card_name for card_name, card_name_lower, _ in self.valuable_card_sets
+                        if card_name_lower in found]
+        set_matches = [card_name for card_name in name_matches
+                       if set_code is not None and set_code in self.valuable_cards[card_name]]
+        return name_matches, set_matches
+
     def _extract_price(self, price_text: str) -> float:
         """Extract numeric price from text."""
         try:
             # Remove currency symbols and commas
-            cleaned = re.sub(r'[^\d.]', '', price_text)
+            cleaned = self.price_pattern.sub('', price_text)
             return float(cleaned)
         except (ValueError, TypeError):
             return 0.0
 
-    def _determine_condition(self, title: str) -> CardCondition:
+    def _determine_condition(self, found: set) -> CardCondition:
         """Determine card condition from title."""
-        for condition, keywords in self.condition_keywords.items():
-            if any(keyword.lower() in title.lower() for keyword in keywords):
-                return condition
-        return CardCondition.UNKNOWN
+        condition = self._first_label(found, self.condition_labels, self.condition_ranks)
+        return condition or CardCondition.UNKNOWN
 
-    def _determine_rarity(self, title: str) -> Optional[str]:
+    def _determine_rarity(self, found: set) -> Optional[str]:
         """Determine card rarity from title."""
-        for rarity, keywords in self.rarity_keywords.items():
-            if any(keyword.lower() in title.lower() for keyword in keywords):
-                return rarity
-        return None
+        return self._first_label(found, self.rarity_labels, self.rarity_ranks)
 
     def _extract_set_info(self, title: str) -> Tuple[Optional[str], Optional[str]]:
         """Extract set code and card number from title."""
@@ -224,61 +273,56 @@ class CardAnalyzer:
             return match.group(1), match.group(3)
         return None, None
 
-    def _determine_edition(self, title: str) -> Optional[str]:
+    def _determine_edition(self, found: set) -> Optional[str]:
         """Determine card edition from title."""
-        for edition, keywords in self.edition_keywords.items():
-            if any(keyword.lower() in title.lower() for keyword in keywords):
-                return edition
-        return None
+        return self._first_label(found, self.edition_labels, self.edition_ranks)
 
-    def _determine_region(self, title: str) -> Optional[str]:
+    def _determine_region(self, found: set) -> Optional[str]:
         """Determine card region from title."""
-        for region, keywords in self.region_keywords.items():
-            if any(keyword.lower() in title.lower() for keyword in keywords):
-                return region
-        return None
+        return self._first_label(found, self.region_labels, self.region_ranks)
 
-    def _is_valuable_card(self, title: str, set_code: Optional[str]) -> bool:
+    def _is_valuable_card(self, title: str, found: set, set_code: Optional[str],
+                          edition: Optional[str]) -> bool:
         """Check if the card is valuable based on name and set code."""
-        title_lower = title.lower()
-        
         # Log the analysis process
         logger.debug(f"Analyzing card value for: {title}")
         
-        # Check against known valuable cards
-        for card_name, valid_sets in self.valuable_cards.items():
-            if card_name.lower() in title_lower:
-                if set_code is None or set_code in valid_sets:
-                    logger.debug(f"Card matched valuable card list: {card_name}")
-                    return True
-        
-        # Check for high rarity
-        high_rarities = ["Secret Rare", "Ultimate Rare", "Ghost Rare", "Collector's Rare", "Starlight Rare"]
-        for rarity in high_rarities:
-            if rarity.lower() in title_lower:
-                logger.debug(f"Card has high rarity: {rarity}")
-                return True
+        # Cheapest checks first: each is a single comparison or set operation,
+        # the known valuable cards loop runs last
         
         # Check for 1st Edition
-        if any(keyword in title_lower for keyword in ["1st", "first edition", "初版", "初刷"]):
+        if edition == "1st Edition":
             logger.debug("Card is 1st Edition")
             return True
-            
+        
+        # Check for high rarity
+        high_rarities = self.high_rarity_set & found
+        if high_rarities:
+            logger.debug(f"Card has high rarity: {', '.join(high_rarities)}")
+            return True
+        
         # Check for sealed/unopened products
-        if any(keyword in title_lower for keyword in ["sealed", "未開封", "新品未開封"]):
+        if not self.sealed_set.isdisjoint(found):
             logger.debug("Card is sealed/unopened")
             return True
             
         # Check for tournament/event items
-        if any(keyword in title_lower for keyword in ["tournament", "event", "championship", "大会", "イベント"]):
+        if not self.event_set.isdisjoint(found):
             logger.debug("Card is from tournament/event")
             return True
             
         # Check for special editions
-        if any(keyword in title_lower for keyword in ["special", "limited", "promo", "限定", "特典"]):
+        if not self.special_set.isdisjoint(found):
             logger.debug("Card is special/limited edition")
             return True
         
+        # Check against known valuable cards
+        for card_name, card_name_lower, valid_sets in self.valuable_card_sets:
+            if card_name_lower in found:
+                if set_code is None or set_code in valid_sets:
+                    logger.debug(f"Card matched valuable card list: {card_name}")
+                    return True
+        
         logger.debug("Card did not meet any value criteria")
         return False
 
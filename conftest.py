@@ -0,0 +1,2 @@
+# Keeps the repository root on sys.path, so tests import src.* and the
+# top-level analyzers under a plain `pytest` run
@@ -1,9 +1,32 @@
 import os
+import copy
+import json
+import asyncio
+import time
 import logging
 import openai
-from typing import Dict, Any, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+try:
+    import orjson
+except ImportError:
+    orjson = None
+from typing import Dict, Any, List, Optional, Tuple
 from dataclasses import dataclass
 from enum import Enum
+from collections import OrderedDict
+from card_analyzer import CardAnalyzer, CardInfo
+
+def loads_json(text: str) -> Any:
+    """Parse JSON with orjson's C parser when it is installed."""
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+def dumps_json_line(data: Any) -> bytes:
+    """Serialize data as one compact UTF-8 JSON line for a JSONL upload."""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data).encode("utf-8")
 
 class CardCondition(Enum):
     MINT = "Mint"
@@ -30,17 +53,8 @@ class CardAnalysis:
     recommendation: str
     notes: List[str]
 
-class AIAnalyzer:
-    def __init__(self, api_key: Optional[str] = None):
-        """Initialize the AI analyzer with OpenAI API key."""
-        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
-        if not self.api_key:
-            raise ValueError("OpenAI API key is required")
-        
-        openai.api_key = self.api_key
-        
-        # System prompt for card analysis
-        self.system_prompt = """You are a collectible card buying assistant. Given a listing, analyze if it's worth buying based on price and condition.
+# System prompt for card analysis
+SYSTEM_PROMPT = """You are a collectible card buying assistant. Given a listing, analyze if it's worth buying based on price and condition.
 
 Rules:
 - Prefer cards in condition S or A (Mint or Near Mint)
@@ -73,107 +87,445 @@ Provide analysis in this format:
     "notes": ["string"]
 }"""
 
+# Per-listing user prompt, filled in by AIAnalyzer._build_prompt
+LISTING_PROMPT_TEMPLATE = """
+Title: {title}
+Description: {description}
+Price: ¥{price_yen:,}
+eBay Sold Prices: {ebay_prices}
+"""
+
+# Listings under this price, in yen, that name no known valuable card are
+# passed on without asking the model
+CHEAP_LISTING_YEN = 1000
+
+# Rarities that, with a known valuable card in a matching set, make a listing
+# a buy without asking the model
+RULE_BUY_RARITIES = frozenset({
+    "Secret Rare", "Ultimate Rare", "Ghost Rare", "Collector's Rare", "Starlight Rare", "Ultra Rare"
+})
+
+# Card images downloaded at once while building a Batch API job
+BATCH_IMAGE_WORKERS = 8
+
+# Confidence reported for recommendations made by the rules alone
+RULE_DECISION_CONFIDENCE = 0.75
+
+class AIAnalyzer:
+    def __init__(self, api_key: Optional[str] = None):
+        """Initialize the AI analyzer with OpenAI API key."""
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        if not self.api_key:
+            raise ValueError("OpenAI API key is required")
+        
+        # Client shared by the sync and Batch API paths
+        self.client = openai.OpenAI(api_key=self.api_key)
+        
+        # Most recently used analyses, keyed on the listing inputs
+        self.cache_size = 4096
+        self._cache: "OrderedDict[tuple, CardAnalysis]" = OrderedDict()
+        
+        # System prompt for card analysis
+        self.system_prompt = SYSTEM_PROMPT
+        
+        # Rule-based analyzer that settles clear-cut listings without the model
+        self.card_analyzer = CardAnalyzer()
+
     def analyze_card(self, 
                     title: str,
                     description: str,
                     price_yen: float,
                     image_url: Optional[str] = None,
-                    ebay_prices: Optional[List[float]] = None) -> CardAnalysis:
+                    ebay_prices: Optional[List[float]] = None,
+                    force_ai: bool = False) -> CardAnalysis:
         """
         Analyze a card listing using GPT-4 Vision and text analysis.
         
+        Listings the rule-based analysis already settles (see
+        _rule_based_analysis) are answered without calling the model.
+        
         Args:
             title: Card title
             description: Card description
             price_yen: Price in Japanese Yen
             image_url: URL of card image (optional)
             ebay_prices: List of recent eBay sold prices (optional)
+            force_ai: Always ask the model, even when the rules are decisive
             
         Returns:
             CardAnalysis object with detailed analysis
         """
+        if not force_ai:
+            rule_analysis = self._rule_based_analysis(title, price_yen, ebay_prices)
+            if rule_analysis is not None:
+                return rule_analysis
+        
+        # Re-scraped and retried listings are common; reuse earlier answers
+        cache_key = self._cache_key(title, description, price_yen, image_url, ebay_prices)
+        cached = self._cached_analysis(cache_key)
+        if cached is not None:
+            return cached
+        
         try:
-            # Prepare the analysis prompt
-            analysis_prompt = f"""
-Title: {title}
-Description: {description}
-Price: ¥{price_yen:,}
-eBay Sold Prices: {', '.join(f'${p:,.2f}' for p in ebay_prices) if ebay_prices else 'No data'}
-"""
-
-            # If we have an image, use GPT-4 Vision
-            if image_url:
-                # Download image
-                import requests
-                from io import BytesIO
-                from PIL import Image
-                
-                response = requests.get(image_url)
-                image = Image.open(BytesIO(response.content))
-                
-                # Convert image to base64
-                import base64
-                buffered = BytesIO()
-                image.save(buffered, format="PNG")
-                img_str = base64.b64encode(buffered.getvalue()).decode()
-                
-                # Call GPT-4 Vision
-                response = openai.ChatCompletion.create(
-                    model="gpt-4-vision-preview",
-                    messages=[
-                        {"role": "system", "content": self.system_prompt},
-                        {
-                            "role": "user",
-                            "content": [
-                                {"type": "text", "text": analysis_prompt},
-                                {
-                                    "type": "image_url",
-                                    "image_url": {
-                                        "url": f"data:image/png;base64,{img_str}"
-                                    }
-                                }
-                            ]
-                        }
-                    ],
-                    max_tokens=1000
-                )
-            else:
-                # Use regular GPT-4 for text-only analysis
-                response = openai.ChatCompletion.create(
-                    model="gpt-4",
-                    messages=[
-                        {"role": "system", "content": self.system_prompt},
-                        {"role": "user", "content": analysis_prompt}
-                    ],
-                    max_tokens=1000
-                )
+            analysis_prompt = self._build_prompt(title, description, price_yen, ebay_prices)
+            model, messages = self._build_messages(analysis_prompt, image_url)
+            
+            response = self.client.chat.completions.create(
+                model=model,
+                messages=messages,
+                max_tokens=1000
+            )
             
             # Parse the response
-            analysis_text = response.choices[0].message.content
-            import json
-            analysis_data = json.loads(analysis_text)
-            
-            # Convert to CardAnalysis object
-            return CardAnalysis(
-                card_name=analysis_data["card_name"],
-                set_code=analysis_data["set_code"],
-                card_number=analysis_data["card_number"],
-                rarity=analysis_data["rarity"],
-                edition=analysis_data["edition"],
-                region=analysis_data["region"],
-                condition=CardCondition(analysis_data["condition"]),
-                condition_notes=analysis_data["condition_notes"],
-                market_price=analysis_data["market_price"],
-                profit_margin=analysis_data["profit_margin"],
-                confidence=analysis_data["confidence"],
-                recommendation=analysis_data["recommendation"],
-                notes=analysis_data["notes"]
+            analysis = self._parse_analysis(response.choices[0].message.content)
+            
+            self._store_analysis(cache_key, analysis)
+            return copy.deepcopy(analysis)
+            
+        except Exception as e:
+            logging.error(f"Error in AI analysis: {str(e)}")
+            return None
+
+    async def analyze_card_async(self,
+                                 client: "openai.AsyncOpenAI",
+                                 title: str,
+                                 description: str,
+                                 price_yen: float,
+                                 image_url: Optional[str] = None,
+                                 ebay_prices: Optional[List[float]] = None,
+                                 force_ai: bool = False) -> Optional[CardAnalysis]:
+        """Async version of analyze_card that sends its request through the given client."""
+        if not force_ai:
+            rule_analysis = self._rule_based_analysis(title, price_yen, ebay_prices)
+            if rule_analysis is not None:
+                return rule_analysis
+        
+        cache_key = self._cache_key(title, description, price_yen, image_url, ebay_prices)
+        cached = self._cached_analysis(cache_key)
+        if cached is not None:
+            return cached
+        
+        try:
+            analysis_prompt = self._build_prompt(title, description, price_yen, ebay_prices)
+            # Image download and encoding are blocking, keep them off the event loop
+            model, messages = await asyncio.to_thread(self._build_messages, analysis_prompt, image_url)
+            
+            response = await client.chat.completions.create(
+                model=model,
+                messages=messages,
+                max_tokens=1000
             )
             
+            analysis = self._parse_analysis(response.choices[0].message.content)
+            
+            self._store_analysis(cache_key, analysis)
+            return copy.deepcopy(analysis)
+            
         except Exception as e:
             logging.error(f"Error in AI analysis: {str(e)}")
             return None
 
+    def _rule_based_analysis(self,
+                             title: str,
+                             price_yen: float,
+                             ebay_prices: Optional[List[float]] = None) -> Optional[CardAnalysis]:
+        """
+        Return a PASS or BUY analysis if the rules settle the listing, otherwise None.
+        
+        Cheap listings that name no known valuable card are a PASS. A known
+        valuable card in one of its valuable sets, with a set code and a high
+        rarity, is a BUY.
+        """
+        info = self.card_analyzer.analyze_card({'title': title, 'price': str(price_yen)})
+        name_matches, set_matches = self.card_analyzer.valuable_card_matches(title, info.set_code)
+        rule_score = len(name_matches) + len(set_matches)
+        
+        if rule_score == 0 and price_yen < CHEAP_LISTING_YEN:
+            return self._rule_card_analysis(info, None, "PASS", ebay_prices,
+                                            "Rule-based: no known valuable card at a low price")
+        if rule_score >= 2 and info.set_code and info.rarity in RULE_BUY_RARITIES:
+            return self._rule_card_analysis(info, set_matches[0], "BUY", ebay_prices,
+                                            f"Rule-based: {info.rarity} {set_matches[0]} from {info.set_code}")
+        return None
+
+    def _rule_card_analysis(self,
+                            info: CardInfo,
+                            card_name: Optional[str],
+                            recommendation: str,
+                            ebay_prices: Optional[List[float]],
+                            note: str) -> CardAnalysis:
+        """Build the CardAnalysis for a recommendation the rules made on their own."""
+        try:
+            condition = CardCondition(info.condition.value)
+        except ValueError:
+            # Very Good and Unknown have no counterpart here
+            condition = None
+        return CardAnalysis(
+            card_name=card_name or "",
+            set_code=info.set_code or "",
+            card_number=info.card_number or "",
+            rarity=info.rarity or "",
+            edition=info.edition or "",
+            region=info.region or "",
+            condition=condition,
+            condition_notes=[],
+            market_price=sum(ebay_prices) / len(ebay_prices) if ebay_prices else 0.0,
+            profit_margin=0.0,
+            confidence=RULE_DECISION_CONFIDENCE,
+            recommendation=recommendation,
+            notes=[note]
+        )
+
+    def _cache_key(self,
+                   title: str,
+                   description: str,
+                   price_yen: float,
+                   image_url: Optional[str],
+                   ebay_prices: Optional[List[float]]) -> tuple:
+        """Key a listing's analyze_card inputs for the result cache."""
+        return (title, description or "", price_yen, image_url, tuple(ebay_prices or ()))
+
+    def _cached_analysis(self, cache_key: tuple) -> Optional[CardAnalysis]:
+        """Return a copy of the cached analysis for a key, or None."""
+        if cache_key not in self._cache:
+            return None
+        self._cache.move_to_end(cache_key)
+        return copy.deepcopy(self._cache[cache_key])
+
+    def _store_analysis(self, cache_key: tuple, analysis: CardAnalysis) -> None:
+        """Cache an analysis, dropping the least recently used one when full."""
+        self._cache[cache_key] = analysis
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def analyze_many(self,
+                           listings: List[Dict[str, Any]],
+                           concurrency: int = 10) -> List[Optional[CardAnalysis]]:
+        """
+        Analyze listings concurrently, with at most `concurrency` requests in flight.
+        
+        Args:
+            listings: Dicts with the analyze_card arguments as keys
+            concurrency: Maximum number of simultaneous OpenAI requests
+            
+        Returns:
+            One CardAnalysis (or None on failure) per listing, in input order
+        """
+        # The client retries timeouts, rate limits and 5xx responses with
+        # exponential backoff on its own
+        client = openai.AsyncOpenAI(api_key=self.api_key, max_retries=3)
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def bounded(listing: Dict[str, Any]) -> Optional[CardAnalysis]:
+            async with semaphore:
+                return await self.analyze_card_async(
+                    client,
+                    listing["title"],
+                    listing.get("description", ""),
+                    listing["price_yen"],
+                    listing.get("image_url"),
+                    listing.get("ebay_prices"),
+                    listing.get("force_ai", False)
+                )
+        
+        # Listings repeated within the batch are sent once; the cache only helps
+        # once an earlier request has finished
+        keys = [
+            self._cache_key(listing["title"], listing.get("description", ""), listing["price_yen"],
+                            listing.get("image_url"), listing.get("ebay_prices"))
+            for listing in listings
+        ]
+        unique: Dict[tuple, Dict[str, Any]] = {}
+        for key, listing in zip(keys, listings):
+            unique.setdefault(key, listing)
+        
+        try:
+            analyses = await asyncio.gather(*(bounded(listing) for listing in unique.values()))
+        finally:
+            await client.close()
+        
+        by_key = dict(zip(unique, analyses))
+        return [copy.deepcopy(by_key[key]) for key in keys]
+
+    def analyze_cards_batch(self,
+                            listings: List[Dict[str, Any]],
+                            poll_interval: int = 60) -> List[Optional[CardAnalysis]]:
+        """
+        Analyze many listings with one OpenAI Batch API job.
+        
+        Batch jobs cost half as much as individual requests but may take up to
+        24 hours, so this is meant for offline runs over large scrapes.
+        
+        Args:
+            listings: Dicts with the analyze_card arguments as keys
+            poll_interval: Seconds to wait between batch status checks
+            
+        Returns:
+            One CardAnalysis (or None on failure) per listing, in input order
+        """
+        results: List[Optional[CardAnalysis]] = [None] * len(listings)
+        
+        # Listings answered before, by any path, are not submitted again, and
+        # listings repeated within the batch are submitted once
+        cache_keys = [
+            self._cache_key(listing["title"], listing.get("description", ""), listing["price_yen"],
+                            listing.get("image_url"), listing.get("ebay_prices"))
+            for listing in listings
+        ]
+        pending = []
+        first_index: Dict[tuple, int] = {}
+        for index, cache_key in enumerate(cache_keys):
+            results[index] = self._cached_analysis(cache_key)
+            if results[index] is None and cache_key not in first_index:
+                first_index[cache_key] = index
+                pending.append(index)
+        if not pending:
+            return results
+        
+        try:
+            prompts = [
+                self._build_prompt(
+                    listings[index]["title"],
+                    listings[index].get("description", ""),
+                    listings[index]["price_yen"],
+                    listings[index].get("ebay_prices")
+                )
+                for index in pending
+            ]
+            # Image downloads dominate building the job; run them side by side
+            with ThreadPoolExecutor(max_workers=BATCH_IMAGE_WORKERS) as executor:
+                built = list(executor.map(
+                    self._build_messages, prompts, (listings[index].get("image_url") for index in pending)
+                ))
+            
+            # One JSONL request line per listing, keyed by its index
+            lines = []
+            for index, (model, messages) in zip(pending, built):
+                lines.append(dumps_json_line({
+                    "custom_id": str(index),
+                    "method": "POST",
+                    "url": "/v1/chat/completions",
+                    "body": {"model": model, "messages": messages, "max_tokens": 1000}
+                }))
+            
+            batch_input = self.client.files.create(
+                file=("card_analysis_batch.jsonl", b"\n".join(lines)),
+                purpose="batch"
+            )
+            batch = self.client.batches.create(
+                input_file_id=batch_input.id,
+                endpoint="/v1/chat/completions",
+                completion_window="24h"
+            )
+            logging.info(f"Submitted batch {batch.id} with {len(pending)} listings")
+            
+            while batch.status not in ("completed", "failed", "expired", "cancelled"):
+                time.sleep(poll_interval)
+                batch = self.client.batches.retrieve(batch.id)
+            
+            if batch.status != "completed" or not batch.output_file_id:
+                logging.error(f"Batch {batch.id} finished with status {batch.status}")
+                return results
+            
+            # Output lines are not guaranteed to be in input order
+            for line in self.client.files.content(batch.output_file_id).text.splitlines():
+                if not line:
+                    continue
+                output = loads_json(line)
+                index = int(output["custom_id"])
+                try:
+                    body = output["response"]["body"]
+                    analysis = self._parse_analysis(body["choices"][0]["message"]["content"])
+                    self._store_analysis(cache_keys[index], analysis)
+                    results[index] = copy.deepcopy(analysis)
+                except Exception as e:
+                    logging.error(f"Error in batch AI analysis for listing {index}: {str(e)}")
+            
+            for index, cache_key in enumerate(cache_keys):
+                if results[index] is None and first_index.get(cache_key, index) != index:
+                    answered = results[first_index[cache_key]]
+                    results[index] = copy.deepcopy(answered) if answered is not None else None
+            
+            return results
+            
+        except Exception as e:
+            logging.error(f"Error in batch AI analysis: {str(e)}")
+            return results
+
+    def _build_prompt(self,
+                      title: str,
+                      description: str,
+                      price_yen: float,
+                      ebay_prices: Optional[List[float]] = None) -> str:
+        """Build the user prompt for one listing."""
+        return LISTING_PROMPT_TEMPLATE.format(
+            title=title,
+            description=description,
+            price_yen=price_yen,
+            ebay_prices=', '.join(f'${p:,.2f}' for p in ebay_prices) if ebay_prices else 'No data'
+        )
+
+    def _build_messages(self, analysis_prompt: str, image_url: Optional[str] = None) -> Tuple[str, List[Dict[str, Any]]]:
+        """Return the model and chat messages for a prompt, with the card image if there is one."""
+        # If we have an image, use GPT-4 Vision
+        if image_url:
+            # Download image
+            import requests
+            from io import BytesIO
+            from PIL import Image
+            
+            response = requests.get(image_url)
+            image = Image.open(BytesIO(response.content))
+            
+            # Convert image to base64
+            import base64
+            buffered = BytesIO()
+            image.save(buffered, format="PNG")
+            img_str = base64.b64encode(buffered.getvalue()).decode()
+            
+            return "gpt-4-vision-preview", [
+                {"role": "system", "content": self.system_prompt},
+                {
+                    "role": "user",
+                    "content": [
+                        {"type": "text", "text": analysis_prompt},
+                        {
+                            "type": "image_url",
+                            "image_url": {
+                                "url": f"data:image/png;base64,{img_str}"
+                            }
+                        }
+                    ]
+                }
+            ]
+        
+        # Use regular GPT-4 for text-only analysis
+        return "gpt-4", [
+            {"role": "system", "content": self.system_prompt},
+            {"role": "user", "content": analysis_prompt}
+        ]
+
+    def _parse_analysis(self, analysis_text: str) -> CardAnalysis:
+        """Convert the model's JSON answer into a CardAnalysis."""
+        analysis_data = loads_json(analysis_text)
+        
+        # Convert to CardAnalysis object
+        return CardAnalysis(
+            card_name=analysis_data["card_name"],
+            set_code=analysis_data["set_code"],
+            card_number=analysis_data["card_number"],
+            rarity=analysis_data["rarity"],
+            edition=analysis_data["edition"],
+            region=analysis_data["region"],
+            condition=CardCondition(analysis_data["condition"]),
+            condition_notes=analysis_data["condition_notes"],
+            market_price=analysis_data["market_price"],
+            profit_margin=analysis_data["profit_margin"],
+            confidence=analysis_data["confidence"],
+            recommendation=analysis_data["recommendation"],
+            notes=analysis_data["notes"]
+        )
+
     def get_ebay_prices(self, card_name: str, set_code: str) -> List[float]:
         """
         Get recent eBay sold prices for a card.
@@ -82,10 +82,20 @@ class BuyeeScraper:
     def _extract_item_data(self, item_element) -> Optional[Dict]:
         """Extract data from a single item card on the search page"""
         try:
-            # Updated selectors based on current Buyee layout
-            title_element = item_element.find_element(By.CSS_SELECTOR, 'a.itemCard__itemName')
-            price_element = item_element.find_element(By.CSS_SELECTOR, '.g-price')
-            image_element = item_element.find_element(By.CSS_SELECTOR, '.itemCard__itemImage img')
+            # Updated selectors based on current Buyee layout. find_elements returns
+            # an empty list instead of raising, so a card with a missing field
+            # doesn't cost an exception round trip from the driver.
+            title_elements = item_element.find_elements(By.CSS_SELECTOR, 'a.itemCard__itemName')
+            price_elements = item_element.find_elements(By.CSS_SELECTOR, '.g-price')
+            image_elements = item_element.find_elements(By.CSS_SELECTOR, '.itemCard__itemImage img')
+            
+            if not (title_elements and price_elements and image_elements):
+                logger.warning("Failed to extract item data: title, price or image not found")
+                return None
+            
+            title_element = title_elements[0]
+            price_element = price_elements[0]
+            image_element = image_elements[0]
             
             item_data = {
                 'title': title_element.text.strip(),
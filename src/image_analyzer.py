@@ -1,13 +1,23 @@
 import os
 import io
+import re
 import base64
+import hashlib
 import logging
 import requests
 import json
 from PIL import Image
 import openai
+try:
+    import orjson
+except ImportError:
+    orjson = None
 import google.generativeai as genai
 from typing import Dict, List, Optional, Any
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from collections import OrderedDict
+from requests.adapters import HTTPAdapter
 
 # Set up logging
 logging.basicConfig(
@@ -16,6 +26,142 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Condition, authenticity, centering and surface questions asked in a single
+# vision request
+COMBINED_ANALYSIS_PROMPT = """Analyze this Yu-Gi-Oh card image carefully. Focus on:
+1. Surface condition: Are there any visible scratches, scuffs, or surface wear?
+2. Edge condition: Is there any edge wear, whitening, or damage?
+3. Corner condition: Are the corners sharp or worn?
+4. Creases: Are there any visible creases or folds?
+5. Overall condition: What is the overall condition of the card?
+6. Authenticity: Does the card look genuine, or are there signs it is counterfeit?
+7. Centering: How well centered is the card's artwork and border?
+
+Based on your analysis, provide a concise summary in the 'condition_analysis' field and a boolean 'is_damaged' field.
+If you see *any* damage (scratches, scuffs, wear, creases, folds, whitening, etc.), set 'is_damaged' to true.
+If the card appears to be in perfect condition with no visible flaws, set 'is_damaged' to false.
+
+Respond ONLY with a JSON object in the following format:
+{
+  "condition_analysis": "Your detailed analysis here.",
+  "is_damaged": true/false,
+  "authenticity": "Your assessment of authenticity.",
+  "centering": "Your assessment of centering.",
+  "surface_quality": "Your assessment of the surface."
+}
+"""
+
+# Condition questions for the Gemini fallback, requesting JSON output
+GEMINI_ANALYSIS_PROMPT = """Analyze this Yu-Gi-Oh card image carefully. Focus on:
+1. Surface condition: Are there any visible scratches, scuffs, or surface wear?
+2. Edge condition: Is there any edge wear, whitening, or damage?
+3. Corner condition: Are the corners sharp or worn?
+4. Creases: Are there any visible creases or folds?
+5. Overall condition: What is the overall condition of the card?
+
+Based on your analysis, provide a concise summary in the 'condition_analysis' field and a boolean 'is_damaged' field.
+If you see *any* damage (scratches, scuffs, wear, creases, folds, whitening, etc.), set 'is_damaged' to true.
+If the card appears to be in perfect condition with no visible flaws, set 'is_damaged' to false.
+
+Respond ONLY with a JSON object in the following format:
+{
+  "condition_analysis": "Your detailed analysis here.",
+  "is_damaged": true/false
+}
+"""
+
+# Longest edge, in pixels, of images sent for analysis unless hi_res is requested
+MAX_IMAGE_EDGE = 1024
+
+# Images larger than this are never downloaded
+MAX_IMAGE_BYTES = 10 * 1024 * 1024
+
+# Images with more pixels than this are rejected before decoding
+# (decompression bombs); checked per image, Pillow's own limit is left alone
+MAX_IMAGE_PIXELS = 24_000_000
+
+# Remote images up to this size are passed to the vision API by URL; larger
+# ones are downloaded and downscaled first
+REMOTE_IMAGE_MAX_BYTES = 1024 * 1024
+
+# Number of base64-encoded images kept per analyzer
+ENCODED_IMAGE_CACHE_SIZE = 64
+
+# Damage wording used to judge the card when the model's reply is not JSON
+DAMAGE_TERMS_PATTERN = re.compile(
+    r'scratch|scuff|wear|damage|crease|fold|whitening', re.IGNORECASE)
+
+# Outermost {...} block in a reply wrapped in prose or a code fence
+JSON_OBJECT_PATTERN = re.compile(r'\{.*\}', re.DOTALL)
+
+def _loads_json(text: str) -> Any:
+    """Parse JSON with orjson when installed, allowing raw control characters in strings."""
+    if orjson is not None:
+        try:
+            return orjson.loads(text)
+        except orjson.JSONDecodeError:
+            pass  # orjson has no strict=False; let the stdlib parser decide
+    return json.loads(text, strict=False)
+
+def parse_analysis_json(raw_analysis: str) -> Optional[Dict[str, Any]]:
+    """Parse a vision reply as a JSON object, or return None if it is not one."""
+    try:
+        parsed = _loads_json(raw_analysis)
+    except json.JSONDecodeError:
+        # Only scan for an embedded object when the plain parse fails
+        match = JSON_OBJECT_PATTERN.search(raw_analysis)
+        if not match:
+            return None
+        try:
+            parsed = _loads_json(match.group(0))
+        except json.JSONDecodeError:
+            return None
+    return parsed if isinstance(parsed, dict) else None
+
+def is_remote_url(url: Optional[str]) -> bool:
+    """Return True if the vision API can fetch the image from url itself."""
+    return bool(url) and url.startswith(('http://', 'https://'))
+
+def open_image(image_content: bytes) -> Image.Image:
+    """Open image bytes, raising ValueError if the image has too many pixels to decode."""
+    # Image.open only reads the header, so the size is known before decoding
+    image = Image.open(io.BytesIO(image_content))
+    width, height = image.size
+    if width * height > MAX_IMAGE_PIXELS:
+        raise ValueError(f"Image is {width}x{height}, over the {MAX_IMAGE_PIXELS} pixel limit")
+    return image
+
+@lru_cache(maxsize=1)
+def _gemini_model() -> "genai.GenerativeModel":
+    """Configure Gemini once per process and return the shared vision model."""
+    gemini_api_key = os.getenv('GEMINI_API_KEY')
+    if not gemini_api_key:
+        logger.error("GEMINI_API_KEY environment variable not set.")
+        # Similar to OpenAI, handle missing key.
+    genai.configure(api_key=gemini_api_key)
+    return genai.GenerativeModel('gemini-pro-vision')
+
+@lru_cache(maxsize=1)
+def _image_session() -> requests.Session:
+    """Return the process-wide session used for image downloads."""
+    session = requests.Session()
+    session.headers.update({
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+        'Accept': 'image/avif,image/webp,image/apng,image/svg+xml,image/*,*/*;q=0.8',
+        'Accept-Language': 'ja,en-US;q=0.9,en;q=0.8',
+        'Referer': 'https://buyee.jp/', # Keep this specific if images are primarily from buyee.jp
+        'Connection': 'keep-alive',
+        'Sec-Fetch-Dest': 'image',
+        'Sec-Fetch-Mode': 'no-cors',
+        'Sec-Fetch-Site': 'same-origin',
+        'DNT': '1',
+    })
+    # Keep enough pooled connections for the concurrent HEAD requests
+    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
 class ImageAnalyzer:
     """Analyzes card images using OpenAI and Gemini Vision APIs."""
     
@@ -26,121 +172,130 @@ class ImageAnalyzer:
             logger.error("OPENAI_API_KEY environment variable not set.")
             # Depending on severity, you might want to raise an exception here
             # or disable OpenAI functionality. For now, we'll proceed but log.
-        openai.api_key = openai_api_key
+        self.openai_client = openai.OpenAI(api_key=openai_api_key) if openai_api_key else None
         
-        # Initialize Gemini
-        gemini_api_key = os.getenv('GEMINI_API_KEY')
-        if not gemini_api_key:
-            logger.error("GEMINI_API_KEY environment variable not set.")
-            # Similar to OpenAI, handle missing key.
-        genai.configure(api_key=gemini_api_key)
-        self.gemini_model = genai.GenerativeModel('gemini-pro-vision')
+        # Gemini model and image download session are shared by every analyzer
+        self.gemini_model = _gemini_model()
+        self.session = _image_session()
         
-        # Create a session for image downloads
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'image/avif,image/webp,image/apng,image/svg+xml,image/*,*/*;q=0.8',
-            'Accept-Language': 'ja,en-US;q=0.9,en;q=0.8',
-            'Referer': 'https://buyee.jp/', # Keep this specific if images are primarily from buyee.jp
-            'Connection': 'keep-alive',
-            'Sec-Fetch-Dest': 'image',
-            'Sec-Fetch-Mode': 'no-cors',
-            'Sec-Fetch-Site': 'same-origin',
-            'DNT': '1',
-        })
+        # Recently encoded images, most recently used last
+        self._encoded_images: "OrderedDict[tuple, str]" = OrderedDict()
+    
+    def _get_content_length(self, url: str) -> int:
+        """Return an image's size from a HEAD request, or 0 if it can't be determined."""
+        try:
+            response = self.session.head(url, timeout=5)
+            response.raise_for_status() # Raise an exception for HTTP errors
+            return int(response.headers.get('content-length', 0))
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"Network or HTTP error for {url}: {e}")
+        except Exception as e:
+            logger.warning(f"General error checking image size for {url}: {str(e)}")
+        return 0
     
     def get_largest_image(self, image_urls: List[str]) -> tuple[Optional[bytes], Optional[str]]:
         """Find and download the largest available image from a list of URLs."""
-        largest_size = 0
-        largest_image = None
-        largest_url = None
-        
         if not image_urls:
             logger.warning("No image URLs provided to get_largest_image.")
             return None, None
 
         logger.info(f"Attempting to download images from {len(image_urls)} URLs.")
-        for url in image_urls:
+        
+        # Size every candidate with concurrent HEAD requests, then download only
+        # the largest instead of every image that beats the previous best
+        with ThreadPoolExecutor(max_workers=min(8, len(image_urls))) as executor:
+            sizes = list(executor.map(self._get_content_length, image_urls))
+        
+        candidates = sorted(
+            ((size, url) for size, url in zip(sizes, image_urls) if 0 < size <= MAX_IMAGE_BYTES),
+            key=lambda candidate: candidate[0],
+            reverse=True
+        )
+        
+        # Fall back to the next largest if a download fails
+        for size, url in candidates:
             try:
-                # Try HEAD request first to check size
-                response = self.session.head(url, timeout=5)
-                response.raise_for_status() # Raise an exception for HTTP errors
-                content_length = int(response.headers.get('content-length', 0))
-                
-                if content_length > largest_size:
-                    # If this is larger, download the full image
-                    img_response = self.session.get(url, timeout=10)
-                    img_response.raise_for_status() # Raise an exception for HTTP errors
-                    
-                    largest_size = content_length
-                    largest_image = img_response.content
-                    largest_url = url
-                    logger.info(f"Found larger image: {url} ({content_length} bytes)")
+                img_response = self.session.get(url, timeout=10)
+                img_response.raise_for_status() # Raise an exception for HTTP errors
+                logger.info(f"Selected largest image: {url} ({size} bytes)")
+                return img_response.content, url
             except requests.exceptions.RequestException as e:
                 logger.warning(f"Network or HTTP error for {url}: {e}")
-            except Exception as e:
-                logger.warning(f"General error checking image size for {url}: {str(e)}")
             
-        if largest_image:
-            logger.info(f"Selected largest image: {largest_url} ({largest_size} bytes)")
-            return largest_image, largest_url
         logger.error("Failed to download any image from the provided URLs.")
         return None, None
     
-    def analyze_with_openai(self, image_content: bytes, image_url: str) -> Optional[Dict[str, Any]]:
-        """Analyze image using OpenAI Vision API with detailed prompt and error handling."""
-        if not openai.api_key:
+    def _encode_image(self, image_content: bytes, hi_res: bool = False) -> str:
+        """Return the image as base64 JPEG, downscaled for upload unless hi_res is set."""
+        # Retries and repeated listings send the same image again; key on a
+        # digest of the bytes rather than holding the raw images as keys
+        cache_key = (hashlib.blake2b(image_content, digest_size=16).digest(), hi_res)
+        if cache_key in self._encoded_images:
+            self._encoded_images.move_to_end(cache_key)
+            return self._encoded_images[cache_key]
+        
+        image = open_image(image_content)
+        if not hi_res:
+            # Let the JPEG decoder scale down by 1/2, 1/4 or 1/8 while decoding
+            # instead of decoding at full size; a no-op for other formats
+            image.draft("RGB", (MAX_IMAGE_EDGE, MAX_IMAGE_EDGE))
+        # Ensure image is in RGB mode before saving as JPEG to avoid errors with alpha channel
+        if image.mode in ("RGBA", "P"):
+            image = image.convert("RGB")
+        
+        buffered = io.BytesIO()
+        if hi_res:
+            image.save(buffered, format="JPEG", quality=95)  # High quality
+        else:
+            # The vision models don't use detail beyond this, and every extra
+            # pixel costs upload bytes and image tokens
+            image.thumbnail((MAX_IMAGE_EDGE, MAX_IMAGE_EDGE), Image.LANCZOS)
+            image.save(buffered, format="JPEG", quality=80, optimize=True, progressive=True)
+        encoded = base64.b64encode(buffered.getvalue()).decode()
+        
+        self._encoded_images[cache_key] = encoded
+        if len(self._encoded_images) > ENCODED_IMAGE_CACHE_SIZE:
+            self._encoded_images.popitem(last=False)
+        return encoded
+    
+    def analyze_combined(self, image_content: Optional[bytes], hi_res: bool = False,
+                         image_url: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Analyze condition, authenticity, centering and surface in one OpenAI Vision call.
+        
+        One request means the image is uploaded and read by the model once,
+        instead of once per question. When image_url is given OpenAI fetches
+        the image itself and image_content is not encoded.
+        """
+        if self.openai_client is None:
             logger.error("OpenAI API key is not set. Skipping OpenAI analysis.")
             return None
 
         try:
-            # Convert image to base64
-            image = Image.open(io.BytesIO(image_content))
-            buffered = io.BytesIO()
-            # Ensure image is in RGB mode before saving as JPEG to avoid errors with alpha channel
-            if image.mode in ("RGBA", "P"):
-                image = image.convert("RGB")
-            image.save(buffered, format="JPEG", quality=95)  # High quality
-            img_str = base64.b64encode(buffered.getvalue()).decode()
-            
-            # Detailed prompt for card condition analysis, requesting JSON output
-            prompt = """Analyze this Yu-Gi-Oh card image carefully. Focus on:
-1. Surface condition: Are there any visible scratches, scuffs, or surface wear?
-2. Edge condition: Is there any edge wear, whitening, or damage?
-3. Corner condition: Are the corners sharp or worn?
-4. Creases: Are there any visible creases or folds?
-5. Overall condition: What is the overall condition of the card?
-
-Based on your analysis, provide a concise summary in the 'condition_analysis' field and a boolean 'is_damaged' field.
-If you see *any* damage (scratches, scuffs, wear, creases, folds, whitening, etc.), set 'is_damaged' to true.
-If the card appears to be in perfect condition with no visible flaws, set 'is_damaged' to false.
-
-Respond ONLY with a JSON object in the following format:
-{
-  "condition_analysis": "Your detailed analysis here.",
-  "is_damaged": true/false
-}
-"""
+            if image_url:
+                image_ref = image_url
+            else:
+                # Convert image to base64
+                image_ref = f"data:image/jpeg;base64,{self._encode_image(image_content, hi_res)}"
 
             # Call OpenAI Vision API with timeout
-            response = openai.ChatCompletion.create(
+            response = self.openai_client.chat.completions.create(
                 model="gpt-4-vision-preview",
                 messages=[
                     {
                         "role": "user",
                         "content": [
-                            {"type": "text", "text": prompt},
+                            {"type": "text", "text": COMBINED_ANALYSIS_PROMPT},
                             {
                                 "type": "image_url",
                                 "image_url": {
-                                    "url": f"data:image/jpeg;base64,{img_str}"
+                                    "url": image_ref
                                 }
                             }
                         ]
                     }
                 ],
-                max_tokens=500,
+                max_tokens=700,
                 timeout=30  # 30 second timeout
             )
             
@@ -148,35 +303,51 @@ Respond ONLY with a JSON object in the following format:
             logger.info("Successfully received raw analysis from OpenAI.")
             
             # Attempt to parse the JSON response
-            try:
-                parsed_analysis = json.loads(raw_analysis)
-                analysis_text = parsed_analysis.get('condition_analysis', raw_analysis)
-                is_damaged = parsed_analysis.get('is_damaged', False) # Default to False if not present
+            parsed_analysis = parse_analysis_json(raw_analysis)
+            if parsed_analysis is not None:
                 logger.info("Successfully parsed JSON from OpenAI analysis.")
-            except json.JSONDecodeError as e:
-                logger.warning(f"OpenAI did not return valid JSON. Falling back to raw text. Error: {e}")
-                analysis_text = raw_analysis
-                is_damaged = any(term in raw_analysis.lower() for term in [
-                    'scratch', 'scuff', 'wear', 'damage', 'crease', 'fold',
-                    'edge wear', 'corner wear', 'whitening', 'surface wear'
-                ]) # Fallback to keyword matching if JSON parsing fails
+            else:
+                logger.warning("OpenAI did not return valid JSON. Falling back to raw text.")
+                parsed_analysis = {
+                    'condition_analysis': raw_analysis,
+                    'is_damaged': bool(DAMAGE_TERMS_PATTERN.search(raw_analysis)) # Fallback to keyword matching if JSON parsing fails
+                }
             
             return {
-                'analysis': analysis_text,
-                'is_damaged': is_damaged,
+                'analysis': parsed_analysis.get('condition_analysis', raw_analysis),
+                'is_damaged': parsed_analysis.get('is_damaged', False), # Default to False if not present
+                'authenticity': parsed_analysis.get('authenticity'),
+                'centering': parsed_analysis.get('centering'),
+                'surface_quality': parsed_analysis.get('surface_quality'),
                 'source': 'openai'
             }
             
-        except openai.error.Timeout:
+        except openai.APITimeoutError:
             logger.warning("OpenAI request timed out.")
             return None
-        except openai.error.APIError as e:
+        except openai.APIError as e:
             logger.error(f"OpenAI API error: {str(e)}")
             return None
         except Exception as e:
             logger.error(f"Error in OpenAI analysis: {str(e)}")
             return None
     
+    def analyze_with_openai(self, image_content: bytes, image_url: str, hi_res: bool = False) -> Optional[Dict[str, Any]]:
+        """Analyze card condition using OpenAI Vision API."""
+        analysis = None
+        # Small remote images are sent by URL so their bytes aren't uploaded again
+        if is_remote_url(image_url) and len(image_content) <= REMOTE_IMAGE_MAX_BYTES:
+            analysis = self.analyze_combined(None, hi_res, image_url=image_url)
+        if not analysis:
+            analysis = self.analyze_combined(image_content, hi_res)
+        if not analysis:
+            return None
+        return {
+            'analysis': analysis['analysis'],
+            'is_damaged': analysis['is_damaged'],
+            'source': analysis['source']
+        }
+    
     def analyze_with_gemini(self, image_content: bytes, image_url: str) -> Optional[Dict[str, Any]]:
         """Analyze image using Google's Gemini Vision API as fallback."""
         if not genai.get_default_retriever(): # Check if Gemini is configured
@@ -185,50 +356,28 @@ Respond ONLY with a JSON object in the following format:
 
         try:
             # Convert image to PIL Image
-            image = Image.open(io.BytesIO(image_content))
+            image = open_image(image_content)
             # Ensure image is in RGB mode for Gemini if it has an alpha channel
             if image.mode in ("RGBA", "P"):
                 image = image.convert("RGB")
             
-            # Same detailed prompt as OpenAI, requesting JSON output
-            prompt = """Analyze this Yu-Gi-Oh card image carefully. Focus on:
-1. Surface condition: Are there any visible scratches, scuffs, or surface wear?
-2. Edge condition: Is there any edge wear, whitening, or damage?
-3. Corner condition: Are the corners sharp or worn?
-4. Creases: Are there any visible creases or folds?
-5. Overall condition: What is the overall condition of the card?
-
-Based on your analysis, provide a concise summary in the 'condition_analysis' field and a boolean 'is_damaged' field.
-If you see *any* damage (scratches, scuffs, wear, creases, folds, whitening, etc.), set 'is_damaged' to true.
-If the card appears to be in perfect condition with no visible flaws, set 'is_damaged' to false.
-
-Respond ONLY with a JSON object in the following format:
-{
-  "condition_analysis": "Your detailed analysis here.",
-  "is_damaged": true/false
-}
-"""
-            
             # Call Gemini Vision API
-            response = self.gemini_model.generate_content([prompt, image])
+            response = self.gemini_model.generate_content([GEMINI_ANALYSIS_PROMPT, image])
             response.resolve() # Ensure the response is fully resolved
             
             raw_analysis = response.text
             logger.info("Successfully received raw analysis from Gemini.")
             
             # Attempt to parse the JSON response
-            try:
-                parsed_analysis = json.loads(raw_analysis)
+            parsed_analysis = parse_analysis_json(raw_analysis)
+            if parsed_analysis is not None:
                 analysis_text = parsed_analysis.get('condition_analysis', raw_analysis)
                 is_damaged = parsed_analysis.get('is_damaged', False) # Default to False if not present
                 logger.info("Successfully parsed JSON from Gemini analysis.")
-            except json.JSONDecodeError as e:
-                logger.warning(f"Gemini did not return valid JSON. Falling back to raw text. Error: {e}")
+            else:
+                logger.warning("Gemini did not return valid JSON. Falling back to raw text.")
                 analysis_text = raw_analysis
-                is_damaged = any(term in raw_analysis.lower() for term in [
-                    'scratch', 'scuff', 'wear', 'damage', 'crease', 'fold',
-                    'edge wear', 'corner wear', 'whitening', 'surface wear'
-                ]) # Fallback to keyword matching if JSON parsing fails
+                is_damaged = bool(DAMAGE_TERMS_PATTERN.search(raw_analysis)) # Fallback to keyword matching if JSON parsing fails
             
             return {
                 'analysis': analysis_text,
@@ -240,60 +389,33 @@ Respond ONLY with a JSON object in the following format:
             logger.error(f"Error in Gemini analysis: {str(e)}")
             return None
     
-    def analyze_image(self, image_url: str) -> Dict[str, Any]:
+    def analyze_image(self, image_url: str, hi_res: bool = False) -> Dict[str, Any]:
         """Analyze an image using OpenAI's Vision API."""
         try:
+            # Let OpenAI fetch small remote images itself; only download when
+            # the image needs downscaling or the URL-based request fails
+            if is_remote_url(image_url):
+                content_length = self._get_content_length(image_url)
+                if content_length > MAX_IMAGE_BYTES:
+                    logger.error(f"Image at {image_url} is too large to analyze ({content_length} bytes)")
+                    return {"error": "Image too large"}
+                if 0 < content_length <= REMOTE_IMAGE_MAX_BYTES:
+                    analysis = self.analyze_combined(None, hi_res, image_url=image_url)
+                    if analysis:
+                        return analysis
+                    logger.info(f"URL-based analysis failed for {image_url}, downloading instead")
+            
             # Download the image
-            response = requests.get(image_url)
+            response = self.session.get(image_url, timeout=10)
             if response.status_code != 200:
                 logger.error(f"Failed to download image from {image_url}")
                 return {"error": "Failed to download image"}
 
-            # Prepare the image for analysis
-            image_data = base64.b64encode(response.content).decode('utf-8')
-
-            # Make the API call with the updated model
-            response = openai.ChatCompletion.create(
-                model="gpt-4-vision-preview",  # Updated model name
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a Yu-Gi-Oh card expert. Analyze the card image and provide detailed information about its condition and authenticity."
-                    },
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "text",
-                                "text": "Analyze this Yu-Gi-Oh card image and provide information about:\n1. Card condition\n2. Authenticity\n3. Any visible damage or wear\n4. Card centering\n5. Surface quality\nFormat the response as a JSON object."
-                            },
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:image/jpeg;base64,{image_data}"
-                                }
-                            }
-                        ]
-                    }
-                ],
-                max_tokens=500
-            )
-
-            # Extract and parse the response
-            analysis_text = response.choices[0].message.content
-            try:
-                analysis = json.loads(analysis_text)
-                return analysis
-            except json.JSONDecodeError:
-                logger.error(f"Failed to parse OpenAI response as JSON: {analysis_text}")
-                return {
-                    "error": "Failed to parse analysis",
-                    "raw_response": analysis_text
-                }
+            analysis = self.analyze_combined(response.content, hi_res)
+            if not analysis:
+                return {"error": "Failed to analyze image"}
+            return analysis
 
-        except openai.error.APIError as e:
-            logger.error(f"OpenAI API error: {str(e)}")
-            return {"error": f"API error: {str(e)}"}
         except Exception as e:
             logger.error(f"Error in image analysis: {str(e)}")
             return {"error": f"Analysis error: {str(e)}"}
@@ -0,0 +1,73 @@
+from typing import Any, Dict, Iterable, List, Tuple
+import re
+
+def factor_alternation(keywords: Iterable[str]) -> str:
+    """Build a regex matching the longest of the keywords, with common prefixes factored out.
+
+    'promo|pr' becomes 'pr(?:omo)?', so the engine tries each shared
+    prefix once instead of once per keyword.
+    """
+    trie: Dict[str, dict] = {}
+    for keyword in keywords:
+        if keyword:
+            node = trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[''] = {}
+
+    def emit(node: Dict[str, dict]) -> str:
+        branches = []
+        for char, child in node.items():
+            if not char:
+                continue
+            # Collapse runs of single-child nodes into one literal
+            prefix = char
+            while len(child) == 1 and '' not in child:
+                (char, child), = child.items()
+                prefix += char
+            branches.append(re.escape(prefix) + emit(child))
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        # A keyword ends here: the greedy ? still prefers the longer ones
+        return f'(?:{body})?' if '' in node else body
+
+    return emit(trie)
+
+def keyword_ranks(table: Dict[Any, List[str]]) -> Tuple[tuple, Dict[str, int]]:
+    """Split a label -> keywords table into a label tuple and a lower-cased keyword -> index map.
+
+    A keyword listed under several labels maps to the earliest one, which is
+    the label the table's priority order would pick.
+    """
+    ranks = {}
+    for index, keywords in enumerate(table.values()):
+        for keyword in keywords:
+            ranks.setdefault(keyword.lower(), index)
+    return tuple(table), ranks
+
+class KeywordScanner:
+    """Finds every keyword of a fixed set that occurs in a text, in one regex pass."""
+
+    __slots__ = ('pattern', 'implied')
+
+    def __init__(self, keywords: Iterable[str]):
+        """Compile keywords into one overlapping, longest-first, prefix-factored pattern.
+
+        At each position the pattern matches the longest keyword starting there,
+        so each keyword also implies the shorter keywords that are its prefixes.
+        Together that finds every keyword that occurs anywhere in the text.
+        """
+        keywords = sorted(set(keywords), key=len, reverse=True)
+        self.pattern = re.compile(f'(?=({factor_alternation(keywords)}))')
+        self.implied = {
+            keyword: frozenset(prefix for prefix in keywords if keyword.startswith(prefix))
+            for keyword in keywords
+        }
+
+    def find(self, text: str) -> set:
+        """Return the set of keywords that occur in text; match case is the caller's job."""
+        found = set()
+        for match in self.pattern.finditer(text):
+            found |= self.implied[match.group(1)]
+        return found
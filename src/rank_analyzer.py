@@ -1,7 +1,8 @@
 from enum import Enum
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
 import re
 import logging
+from src.keyword_scanner import KeywordScanner
 
 logger = logging.getLogger(__name__)
 
@@ -68,6 +69,24 @@ class RankAnalyzer:
             ]
         }
         
+        # Every (condition, keyword) pair in table order, and the pair indexes
+        # for each keyword, so a description is scanned once for all keywords
+        self.condition_entries = tuple(
+            (condition, keyword)
+            for condition, keywords in self.condition_keywords.items()
+            for keyword in keywords
+        )
+        self.keyword_entries: Dict[str, List[int]] = {}
+        for index, (condition, keyword) in enumerate(self.condition_entries):
+            self.keyword_entries.setdefault(keyword, []).append(index)
+        self.keyword_scanner = KeywordScanner(self.keyword_entries)
+        
+        # One scanner per condition, for checking only a rank's own keywords
+        self.condition_scanners = {
+            condition: KeywordScanner(keywords)
+            for condition, keywords in self.condition_keywords.items()
+        }
+        
         # Rank description patterns
         self.rank_patterns = [
             r'【ランク】([A-Z+]+)',  # Standard rank format
@@ -75,6 +94,18 @@ class RankAnalyzer:
             r'状態[：:]\s*([A-Z+]+)',  # State format
             r'グレード[：:]\s*([A-Z+]+)'  # Grade format
         ]
+        # All rank patterns in one lookahead: group i+1 is rank_patterns[i]. The
+        # prefixes start with different characters, so every match of every
+        # pattern is reported
+        self.rank_re = re.compile(
+            '(?=(?:' + '|'.join(self.rank_patterns) + '))', re.IGNORECASE
+        )
+
+    def _find_condition_entries(self, text: str) -> List[Tuple[CardCondition, str]]:
+        """Return the (condition, keyword) pairs whose keyword occurs in text, in table order."""
+        found = self.keyword_scanner.find(text)
+        indexes = sorted(index for keyword in found for index in self.keyword_entries[keyword])
+        return [self.condition_entries[index] for index in indexes]
 
     def parse_rank(self, description: str) -> Optional[str]:
         """
@@ -84,21 +115,22 @@ class RankAnalyzer:
         if not description:
             return None
             
-        description = description.lower()
+        # First match of each rank pattern, found in a single scan
+        first_matches = {}
+        for match in self.rank_re.finditer(description):
+            first_matches.setdefault(match.lastindex, match.group(match.lastindex))
         
         # Try each rank pattern
-        for pattern in self.rank_patterns:
-            match = re.search(pattern, description, re.IGNORECASE)
-            if match:
-                rank = match.group(1).upper()
-                # Validate the rank
-                if rank in self.rank_to_condition:
-                    return rank
-                # Handle special cases
-                if rank == 'A+':
-                    return 'A'
-                if rank == 'B++':
-                    return 'B+'
+        for index in sorted(first_matches):
+            rank = first_matches[index].upper()
+            # Validate the rank
+            if rank in self.rank_to_condition:
+                return rank
+            # Handle special cases
+            if rank == 'A+':
+                return 'A'
+            if rank == 'B++':
+                return 'B+'
         
         return None
 
@@ -109,10 +141,15 @@ class RankAnalyzer:
         """
         return self.rank_to_condition.get(rank.upper(), CardCondition.UNKNOWN)
 
-    def analyze_condition(self, description: str, seller_condition: str) -> Dict[str, Any]:
+    def analyze_condition(self, description: str, seller_condition: str, audit: bool = False) -> Dict[str, Any]:
         """
         Analyze the condition based on both the rank and seller's condition description.
         Returns a dictionary with the analysis results.
+        
+        When a rank maps to a good condition (see is_good_condition), only the
+        keywords of that condition are looked for, unless audit is set. Lower
+        ranks, and every rank when auditing, check all conditions and report
+        mismatches with the rank as warnings.
         """
         result = {
             'rank': None,
@@ -135,21 +172,28 @@ class RankAnalyzer:
             seller_condition = seller_condition.lower()
             found_indicators = []
             
-            # Check for condition keywords
-            for condition, keywords in self.condition_keywords.items():
-                for keyword in keywords:
-                    if keyword in seller_condition:
-                        found_indicators.append(keyword)
-                        # If we haven't found a condition from rank, use this
-                        if result['condition'] == CardCondition.UNKNOWN:
-                            result['condition'] = condition
-                            result['confidence'] += 0.4
-                        # If we have a condition from rank, check for consistency
-                        elif condition != result['condition']:
-                            result['warnings'].append(
-                                f"Condition mismatch: Rank suggests {result['condition'].value}, "
-                                f"but description suggests {condition.value}"
-                            )
+            if rank and not audit and self.is_good_condition(result['condition']):
+                # A good rank already settles the condition; only collect the
+                # keywords that back it up
+                found = self.condition_scanners[result['condition']].find(seller_condition)
+                found_indicators = [
+                    keyword for keyword in self.condition_keywords[result['condition']]
+                    if keyword in found
+                ]
+            else:
+                # Check for condition keywords, found in a single scan
+                for condition, keyword in self._find_condition_entries(seller_condition):
+                    found_indicators.append(keyword)
+                    # If we haven't found a condition from rank, use this
+                    if result['condition'] == CardCondition.UNKNOWN:
+                        result['condition'] = condition
+                        result['confidence'] += 0.4
+                    # If we have a condition from rank, check for consistency
+                    elif condition != result['condition']:
+                        result['warnings'].append(
+                            f"Condition mismatch: Rank suggests {result['condition'].value}, "
+                            f"but description suggests {condition.value}"
+                        )
             
             if found_indicators:
                 result['condition_indicators'].extend(found_indicators)
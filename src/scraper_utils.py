@@ -1,10 +1,14 @@
 import requests
-from bs4 import BeautifulSoup
+import lxml.html
+from lxml.cssselect import CSSSelector
 import logging
 import time
 import random
+import codecs
+import threading
 from typing import Dict, List, Optional, Tuple, Any
-from urllib.parse import quote
+from urllib.parse import quote, urlparse
+from collections import OrderedDict
 import statistics
 import re
 import os
@@ -18,6 +22,43 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 130point sold-price elements, compiled from CSS to XPath once at import
+PRICE_SELECTOR = CSSSelector('span.price')
+
+# Everything that isn't part of a number, stripped from price text
+PRICE_CLEAN_PATTERN = re.compile(r'[^\d.]')
+
+# Page text shown when access is blocked outside Japan, and when the site's
+# rate limiting kicks in
+GEO_BLOCK_MARKER = 'このサービスは日本国内からのみご利用いただけます'
+BOT_CHALLENGE_MARKERS = ('アクセスが集中', '一時的なアクセス制限')
+
+# The same markers as UTF-8, checked against the raw response body
+GEO_BLOCK_MARKER_BYTES = GEO_BLOCK_MARKER.encode('utf-8')
+BOT_CHALLENGE_MARKERS_BYTES = tuple(marker.encode('utf-8') for marker in BOT_CHALLENGE_MARKERS)
+
+# Size of the leading chunk read before deciding to download the rest
+PAGE_HEAD_BYTES = 8192
+
+# Polite delay range, in seconds, between request starts to the same host;
+# requests to different hosts don't wait for each other
+HOST_DELAY_RANGE = (3, 7)
+
+def _is_utf8(encoding: str) -> bool:
+    """Return True if encoding names UTF-8, so markers can be matched as UTF-8 bytes."""
+    try:
+        return codecs.lookup(encoding).name == 'utf-8'
+    except LookupError:
+        return False
+
+def _decode_body(body: bytes, encoding: str) -> str:
+    """Decode a response body the way requests' Response.text does."""
+    try:
+        return body.decode(encoding, errors='replace')
+    except LookupError:
+        # Unknown charset in the headers
+        return body.decode('utf-8', errors='replace')
+
 class RequestHandler:
     """Handles HTTP requests with retry logic and bot detection."""
     
@@ -33,7 +74,26 @@ class RequestHandler:
         self.max_retries = 3
         self.timeout = 10
         
-    def get_page(self, url: str, max_retries: int = None, timeout: int = None) -> Optional[str]:
+        # Per-host pacing, so threads sharing this handler still send each host
+        # at most one request per polite delay
+        self._host_locks: Dict[str, threading.Lock] = {}
+        self._host_locks_lock = threading.Lock()
+        self._host_next_request: Dict[str, float] = {}
+    
+    def _wait_for_host(self, url: str) -> None:
+        """Block until the polite delay since the last request to url's host has passed."""
+        host = urlparse(url).netloc
+        with self._host_locks_lock:
+            host_lock = self._host_locks.setdefault(host, threading.Lock())
+        # Only the wait is serialized; the request itself runs outside the lock
+        with host_lock:
+            wait = self._host_next_request.get(host, 0.0) - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            self._host_next_request[host] = time.monotonic() + random.uniform(*HOST_DELAY_RANGE)
+        
+    def get_page(self, url: str, max_retries: int = None, timeout: int = None,
+                 retry_blocked: bool = True) -> Optional[str]:
         """
         Make a request with retry logic and bot detection.
         
@@ -41,6 +101,8 @@ class RequestHandler:
             url (str): URL to fetch
             max_retries (int): Maximum number of retries
             timeout (int): Request timeout in seconds
+            retry_blocked (bool): Retry after bot detection (HTTP 403/429 or a
+                challenge page); callers with a browser fallback pass False
             
         Returns:
             Optional[str]: Page content or None if failed
@@ -50,46 +112,70 @@ class RequestHandler:
         
         for retry in range(retries):
             try:
-                # Add random delay between requests
-                time.sleep(random.uniform(3, 7))
-                
-                # Make request with timeout
-                response = self.session.get(url, timeout=timeout)
-                
-                # Handle common error cases
-                if response.status_code == 404:
-                    logger.warning(f"Item not found (404): {url}")
-                    return None
+                # Wait out the random delay between requests to this host
+                self._wait_for_host(url)
                 
-                if response.status_code in [403, 429]:
-                    logger.warning(f"Bot detection triggered (HTTP {response.status_code})")
-                    if retry < retries - 1:
-                        delay = self.retry_delays[min(retry, len(self.retry_delays) - 1)]
-                        logger.info(f"Waiting {delay} seconds before retry...")
-                        time.sleep(delay)
-                        continue
-                    return None
-                
-                # Check for Japanese-specific error messages
-                if 'このサービスは日本国内からのみご利用いただけます' in response.text:
-                    logger.error("Access denied. This service is only available from Japan.")
-                    return None
-                
-                if 'アクセスが集中' in response.text or '一時的なアクセス制限' in response.text:
-                    logger.warning("Bot challenge page detected")
-                    if retry < retries - 1:
-                        delay = self.retry_delays[min(retry, len(self.retry_delays) - 1)]
-                        logger.info(f"Waiting {delay} seconds before retry...")
-                        time.sleep(delay)
-                        continue
-                    return None
-                
-                # Raise for any other HTTP errors
-                response.raise_for_status()
-                
-                # Log successful request
-                logger.info(f"Successfully fetched page: {url}")
-                return response.text
+                # Make request with timeout, streaming the body so error
+                # responses aren't downloaded and challenge pages are caught
+                # from the first chunk
+                with self.session.get(url, timeout=timeout, stream=True) as response:
+                    # Handle common error cases
+                    if response.status_code == 404:
+                        logger.warning(f"Item not found (404): {url}")
+                        return None
+                    
+                    if response.status_code in [403, 429]:
+                        logger.warning(f"Bot detection triggered (HTTP {response.status_code})")
+                        if retry_blocked and retry < retries - 1:
+                            delay = self.retry_delays[min(retry, len(self.retry_delays) - 1)]
+                            logger.info(f"Waiting {delay} seconds before retry...")
+                            time.sleep(delay)
+                            continue
+                        return None
+                    
+                    chunks = response.iter_content(chunk_size=PAGE_HEAD_BYTES)
+                    head = next(chunks, b'')
+                    geo_blocked = GEO_BLOCK_MARKER_BYTES in head
+                    challenged = any(marker in head for marker in BOT_CHALLENGE_MARKERS_BYTES)
+                    
+                    page = None
+                    encoding = response.encoding or 'utf-8'
+                    if not geo_blocked and not challenged:
+                        # Only download the rest once the head looks like a real page
+                        body = head + b''.join(chunks)
+                        if _is_utf8(encoding):
+                            # Check for Japanese-specific error messages in the
+                            # raw bytes; the page is only decoded once it passes
+                            geo_blocked = GEO_BLOCK_MARKER_BYTES in body
+                            challenged = any(marker in body for marker in BOT_CHALLENGE_MARKERS_BYTES)
+                        else:
+                            page = _decode_body(body, encoding)
+                            # Check for Japanese-specific error messages
+                            geo_blocked = GEO_BLOCK_MARKER in page
+                            challenged = any(marker in page for marker in BOT_CHALLENGE_MARKERS)
+                    
+                    if geo_blocked:
+                        logger.error("Access denied. This service is only available from Japan.")
+                        return None
+                    
+                    if challenged:
+                        logger.warning("Bot challenge page detected")
+                        if retry_blocked and retry < retries - 1:
+                            delay = self.retry_delays[min(retry, len(self.retry_delays) - 1)]
+                            logger.info(f"Waiting {delay} seconds before retry...")
+                            time.sleep(delay)
+                            continue
+                        return None
+                    
+                    # Raise for any other HTTP errors
+                    response.raise_for_status()
+                    
+                    if page is None:
+                        page = _decode_body(body, encoding)
+                    
+                    # Log successful request
+                    logger.info(f"Successfully fetched page: {url}")
+                    return page
                 
             except requests.RequestException as e:
                 logger.error(f"Error fetching {url}: {str(e)}")
@@ -109,6 +195,11 @@ class CardInfoExtractor:
         # Initialize OpenAI
         self.client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
         
+        # Most recently translated card names, so repeat listings of a card
+        # don't cost another OpenAI round trip
+        self.translation_cache_size = 10000
+        self._translations: "OrderedDict[str, str]" = OrderedDict()
+        
         # Common set codes and their full names
         self.set_patterns = {
             'SDK': 'Starter Deck Kaiba',
@@ -117,9 +208,34 @@ class CardInfoExtractor:
             'SRL': 'Starter Deck Yugi',
             'PSV': 'Pharaoh\'s Servant',
         }
+        
+        # Set codes as one pattern, and each code's priority in set_patterns; the
+        # lookahead also reports codes that overlap in the title
+        self.set_code_ranks = {code: index for index, code in enumerate(self.set_patterns)}
+        self.set_code_pattern = re.compile(
+            '(?=(' + '|'.join(re.escape(code) for code in sorted(self.set_patterns, key=len, reverse=True)) + '))'
+        )
+        
+        # Common words stripped from titles, as one pattern (longest first so a
+        # word is never cut short by a shorter one it starts with)
+        self.common_words = [
+            '遊戯王', 'Yu-Gi-Oh', 'カード', 'card', '1st', 'edition', 'limited', 
+            'まとめ', 'レア', 'rare', 'セット', 'set', 'パック', 'pack',
+            '新品', '未使用', '中古', '使用済み', 'プレイ済み'
+        ]
+        self.common_words_pattern = re.compile(
+            '|'.join(re.escape(word) for word in sorted(self.common_words, key=len, reverse=True))
+        )
+        
+        # Lot numbers at the end of a title (like "864" in "まとめ 864")
+        self.trailing_number_pattern = re.compile(r'\s*\d+$')
     
     def translate_to_english(self, japanese_text: str) -> str:
         """Translate Japanese card name to English using OpenAI."""
+        if japanese_text in self._translations:
+            self._translations.move_to_end(japanese_text)
+            return self._translations[japanese_text]
+        
         try:
             prompt = f"""Translate this Yu-Gi-Oh card name from Japanese to English. 
             Only return the English name, nothing else. If it's a set name or condition, ignore it.
@@ -136,6 +252,11 @@ class CardInfoExtractor:
             
             english_name = response.choices[0].message.content.strip()
             logger.info(f"Translated '{japanese_text}' to '{english_name}'")
+            
+            # Failed translations aren't cached, so they're retried next time
+            self._translations[japanese_text] = english_name
+            if len(self._translations) > self.translation_cache_size:
+                self._translations.popitem(last=False)
             return english_name
             
         except Exception as e:
@@ -145,33 +266,19 @@ class CardInfoExtractor:
     def extract_card_info(self, title: str) -> Tuple[str, Optional[str]]:
         """Extract card name and set from title."""
         try:
-            # Try to find set code first
-            set_code = None
-            for code in self.set_patterns.keys():
-                if code in title.upper():
-                    set_code = code
-                    break
-            
-            # Extract card name
-            card_name = title
-            
-            # Remove common words and set codes
-            common_words = [
-                '遊戯王', 'Yu-Gi-Oh', 'カード', 'card', '1st', 'edition', 'limited', 
-                'まとめ', 'レア', 'rare', 'セット', 'set', 'パック', 'pack',
-                '新品', '未使用', '中古', '使用済み', 'プレイ済み'
-            ]
+            # Try to find set code first, scanning the title once
+            found_codes = {match.group(1) for match in self.set_code_pattern.finditer(title.upper())}
+            set_code = min(found_codes, key=self.set_code_ranks.__getitem__) if found_codes else None
             
-            # Remove common words
-            for word in common_words:
-                card_name = card_name.replace(word, '').strip()
+            # Extract card name, removing common words in a single pass
+            card_name = self.common_words_pattern.sub('', title).strip()
             
             # Remove set code if found
             if set_code:
                 card_name = card_name.replace(set_code, '').strip()
             
             # Remove numbers at the end (like "864" in "まとめ 864")
-            card_name = re.sub(r'\s*\d+$', '', card_name).strip()
+            card_name = self.trailing_number_pattern.sub('', card_name).strip()
             
             # If the name is too short or just numbers, try to extract from description
             if len(card_name) < 3 or card_name.isdigit():
@@ -179,7 +286,7 @@ class CardInfoExtractor:
                 return None, set_code
             
             # Translate to English if it contains Japanese characters
-            if any(ord(c) > 127 for c in card_name):
+            if not card_name.isascii():
                 card_name = self.translate_to_english(card_name)
             
             return card_name, set_code
@@ -193,25 +300,34 @@ class PriceAnalyzer:
     
     def __init__(self):
         self.request_handler = RequestHandler()
+        
+        # Most recently fetched price statistics, keyed on the search term, so
+        # repeat lookups skip the request delay and round trip
+        self.cache_size = 4096
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
     
     def get_130point_prices(self, card_name: str, set_code: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """Get price data from 130point.com."""
         try:
             search_term = f"{card_name} {set_code}" if set_code else card_name
+            if search_term in self._cache:
+                self._cache.move_to_end(search_term)
+                return dict(self._cache[search_term])
+            
             url = f"https://www.130point.com/sales/search/?q={quote(search_term)}"
             
             html = self.request_handler.get_page(url)
             if not html:
                 return None
             
-            soup = BeautifulSoup(html, 'html.parser')
+            tree = lxml.html.fromstring(html)
             
             # Extract prices
             prices = []
-            for price_elem in soup.select('span.price'):
+            for price_elem in PRICE_SELECTOR(tree):
                 try:
-                    price_text = price_elem.text.strip()
-                    price = float(re.sub(r'[^\d.]', '', price_text))
+                    price_text = price_elem.text_content().strip()
+                    price = float(PRICE_CLEAN_PATTERN.sub('', price_text))
                     prices.append(price)
                 except (ValueError, AttributeError):
                     continue
@@ -219,15 +335,26 @@ class PriceAnalyzer:
             if not prices:
                 return None
             
-            # Calculate statistics
-            return {
-                'min_price': min(prices),
-                'max_price': max(prices),
-                'avg_price': statistics.mean(prices),
-                'median_price': statistics.median(prices),
-                'price_count': len(prices)
+            # Calculate statistics from one sort: the ends are the min and max
+            # and the middle is the median. fmean() sums in floating point
+            # instead of mean()'s exact fraction arithmetic
+            prices.sort()
+            count = len(prices)
+            middle = count // 2
+            price_stats = {
+                'min_price': prices[0],
+                'max_price': prices[-1],
+                'avg_price': statistics.fmean(prices),
+                'median_price': prices[middle] if count % 2 else (prices[middle - 1] + prices[middle]) / 2,
+                'price_count': count
             }
             
+            # Only successful lookups are cached, so failures are retried
+            self._cache[search_term] = price_stats
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            return dict(price_stats)
+            
         except Exception as e:
             logger.error(f"Error getting 130point prices: {str(e)}")
             return None
@@ -271,6 +398,10 @@ class ConditionAnalyzer:
                 '傷みあり', '破損あり', '状態悪い'
             ]
         }
+        
+        # Position of each condition from best to worst, for picking the best match
+        condition_order = ['mint', 'near_mint', 'excellent', 'very_good', 'good', 'light_played', 'played', 'poor']
+        self.condition_rank = {condition: index for index, condition in enumerate(condition_order)}
     
     def analyze_condition(self, title: str, description: str, image_analysis: Optional[Dict] = None) -> Dict[str, Any]:
         """Analyze card condition from text and image analysis."""
@@ -293,8 +424,7 @@ class ConditionAnalyzer:
         
         if found_conditions:
             # Use the best condition found
-            condition_order = ['mint', 'near_mint', 'excellent', 'very_good', 'good', 'light_played', 'played', 'poor']
-            best_condition = min(found_conditions, key=lambda x: condition_order.index(x))
+            best_condition = min(found_conditions, key=self.condition_rank.__getitem__)
             result['condition'] = best_condition
             result['confidence'] += 0.6  # Text analysis provides good confidence
         
@@ -0,0 +1,38 @@
+from types import SimpleNamespace
+
+from src.ai_analyzer import AIAnalyzer
+
+
+def make_analyzer(calls):
+    analyzer = AIAnalyzer(api_key="test-key")
+    
+    def create(**kwargs):
+        calls.append(kwargs)
+        raise RuntimeError("no network in tests")
+    
+    analyzer.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    return analyzer
+
+
+def test_cheap_unknown_listing_skips_the_model():
+    calls = []
+    analysis = make_analyzer(calls).analyze_card("謎のカード", "", 500)
+    
+    assert analysis.recommendation == "PASS"
+    assert calls == []
+
+
+def test_valuable_card_in_its_set_is_a_rule_based_buy():
+    calls = []
+    analysis = make_analyzer(calls).analyze_card("Blue-Eyes White Dragon LOB-EN001 Secret Rare", "", 50000)
+    
+    assert analysis.recommendation == "BUY"
+    assert analysis.card_name == "Blue-Eyes White Dragon"
+    assert calls == []
+
+
+def test_force_ai_always_asks_the_model():
+    calls = []
+    make_analyzer(calls).analyze_card("謎のカード", "", 500, force_ai=True)
+    
+    assert len(calls) == 1
@@ -0,0 +1,17 @@
+from src.rank_analyzer import RankAnalyzer, CardCondition
+
+
+def test_low_rank_reports_condition_mismatch():
+    result = RankAnalyzer().analyze_condition("【ランク】C", "新品同様です")
+    
+    assert result['condition'] == CardCondition.GOOD
+    assert "新品同様" in result['condition_indicators']
+    assert any(warning.startswith("Condition mismatch") for warning in result['warnings'])
+
+
+def test_good_rank_only_collects_its_own_keywords():
+    result = RankAnalyzer().analyze_condition("【ランク】S", "新品同様ですが傷あり")
+    
+    assert result['condition'] == CardCondition.MINT
+    assert result['condition_indicators'] == ["Rank S", "新品同様", "新品"]
+    assert result['warnings'] == []
@@ -0,0 +1,22 @@
+from text_analyzer import TextAnalyzer
+
+
+def test_unrecognised_title_goes_to_the_llm(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    analyzer = TextAnalyzer()
+    llm_calls = []
+    
+    def fake_llm(title, description):
+        llm_calls.append(title)
+        return {"card_name_en": "Unknown Card"}
+    
+    monkeypatch.setattr(analyzer, "_analyze_with_llm", fake_llm)
+    
+    title = "遊戯王 レアカード まとめ"
+    rule_analysis = analyzer._analyze_with_rules(title, "")
+    
+    assert rule_analysis['card_name_jp'] is None
+    assert rule_analysis['set_code'] is None
+    assert not analyzer._is_decisive(rule_analysis)
+    assert analyzer.analyze_listing(title, "")['card_name_en'] == "Unknown Card"
+    assert llm_calls == [title]
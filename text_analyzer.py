@@ -2,18 +2,166 @@ from typing import Dict, Any, Optional, List, Tuple
 import re
 import logging
 import os
+import copy
 import json
+import time
+import asyncio
+import hashlib
 import openai
+from functools import lru_cache
+from collections import OrderedDict
+from dataclasses import dataclass
 from dotenv import load_dotenv
+from src.keyword_scanner import KeywordScanner, keyword_ranks
 
 # Load environment variables
 load_dotenv()
 openai.api_key = os.getenv('OPENAI_API_KEY')
 
-class TextAnalyzer:
+logger = logging.getLogger(__name__)
+
+# Fields the LLM extracts from a listing, shared by the single and batched prompts
+LLM_FIELD_INSTRUCTIONS = """with these exact keys: "card_name_jp", "card_name_en", "set_name_jp", "set_code", "card_number", "rarity_jp", "rarity_en", "edition_jp", "edition_en", "language", "condition_notes_from_description", "seller_rank_from_description".
+If information for a key is not present, use null or an empty string for its value. Focus on information explicitly stated or strongly implied. For "condition_notes_from_description", list all phrases related to condition. For "seller_rank_from_description", extract only the rank (e.g., "A", "S", "B+")."""
+
+# System prompts hold every fixed instruction and the user message only the
+# listing, so requests share an identical prefix that OpenAI can cache
+LLM_SYSTEM_PROMPT = f"""You are a specialized parser for Japanese trading card listings. You are given a Japanese item title and description for a trading card.
+
+Extract the following information into a structured JSON object {LLM_FIELD_INSTRUCTIONS}"""
+
+LLM_BATCH_SYSTEM_PROMPT = f"""You are a specialized parser for Japanese trading card listings. You are given several numbered Japanese item titles and descriptions for trading cards.
+
+For each listing, extract the following information into a structured JSON object {LLM_FIELD_INSTRUCTIONS}
+
+Return a JSON object whose "listings" key holds an array with one object per listing, in the same order as the listings."""
+
+TEXT_ANALYSIS_SYSTEM_PROMPT = """You are a Yu-Gi-Oh card expert. Analyze the listing and provide structured information.
+
+Please provide a structured analysis with the following information:
+1. Card Name
+2. Set Code
+3. Card Number
+4. Rarity
+5. Edition (1st Edition or Unlimited)
+6. Language/Region
+7. Condition
+8. Is this a valuable card? (Yes/No)
+9. Confidence Score (0-1)
+10. Matched Keywords
+
+Format the response as a JSON object."""
+
+# Default chat model; field extraction doesn't need a full-size model
+LLM_MODEL = "gpt-4o-mini"
+
+# Listings per batched LLM request, and the output tokens each listing's
+# 12-field JSON answer is budgeted (a typical answer uses well under half);
+# small batches keep one malformed reply from costing many listings
+LLM_BATCH_SIZE = 8
+LLM_MAX_TOKENS_PER_LISTING = 500
+
+# LLM answers kept per analyzer, and how long one stays valid, in seconds
+LLM_CACHE_SIZE = 4096
+LLM_CACHE_TTL = 24 * 60 * 60
+
+# Rule-based results kept per analyzer; rescrapes see the same listings again
+RULE_CACHE_SIZE = 4096
+
+# Rule-based results at or above this confidence, with a card name and set code,
+# are trusted without asking the LLM
+RULE_CONFIDENCE_THRESHOLD = 0.8
+
+# Batch API status polling: first wait and the longest wait, in seconds
+BATCH_POLL_INITIAL = 30
+BATCH_POLL_MAX = 600
+
+@lru_cache(maxsize=1)
+def _openai_client() -> openai.OpenAI:
+    """Return the process-wide OpenAI client, so connections are reused across analyzers."""
+    return openai.OpenAI()
+
+@dataclass
+class RuleAnalysis:
+    # Kept in the rule-result cache; slots skip the per-instance __dict__
+    __slots__ = ('card_name_jp', 'card_name_en', 'set_name_jp', 'set_code', 'card_number',
+                 'rarity_jp', 'rarity_en', 'edition_jp', 'edition_en', 'language',
+                 'condition_notes_from_description', 'seller_rank_from_description',
+                 'confidence_score')
+    
+    card_name_jp: Optional[str]
+    card_name_en: Optional[str]
+    set_name_jp: Optional[str]
+    set_code: Optional[str]
+    card_number: Optional[str]
+    rarity_jp: Optional[str]
+    rarity_en: Optional[str]
+    edition_jp: Optional[str]
+    edition_en: Optional[str]
+    language: Optional[str]
+    condition_notes_from_description: Tuple[str, ...]
+    seller_rank_from_description: Optional[str]
+    confidence_score: float
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the analysis in the dict form the LLM path also returns."""
+        analysis = {field: getattr(self, field) for field in self.__slots__}
+        analysis['condition_notes_from_description'] = list(self.condition_notes_from_description)
+        return analysis
+
+class _JSONObjectBuffer:
+    """Collects streamed text until the first top-level JSON object closes."""
+
     def __init__(self):
-        # Initialize OpenAI client
-        self.client = openai.OpenAI()
+        self.parts: List[str] = []
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+
+    def feed(self, fragment: str) -> bool:
+        """Add a streamed fragment; return True once the object is complete."""
+        for offset, char in enumerate(fragment):
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == '\\':
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = True
+            elif char == '{':
+                self.depth += 1
+            elif char == '}' and self.depth:
+                self.depth -= 1
+                if not self.depth:
+                    self.parts.append(fragment[:offset + 1])
+                    return True
+        self.parts.append(fragment)
+        return False
+
+    @property
+    def text(self) -> str:
+        """The text received so far, ending at the closing brace if there was one."""
+        return ''.join(self.parts)
+
+class TextAnalyzer:
+    def __init__(self, model: str = LLM_MODEL):
+        # Shared OpenAI client
+        self.client = _openai_client()
+        
+        # Chat model used for every LLM call
+        self.model = model
+        
+        # LLM answers by listing digest, least recently used first
+        self._llm_cache: "OrderedDict[bytes, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        
+        # Rule-based results by listing text, least recently used first
+        self._rules_cache = lru_cache(maxsize=RULE_CACHE_SIZE)(self._analyze_with_rules_uncached)
+        
+        # Listings checked by the rules, and how many of those the rules settled alone
+        self.rule_checks = 0
+        self.rule_hits = 0
         
         # Card name patterns (both English and Japanese)
         self.card_name_patterns = [
@@ -31,9 +179,16 @@ class TextAnalyzer:
             r'Black Rose Dragon|ブラックローズ・ドラゴン',
             r'Arcanite Magician|アーカナイト・マジシャン'
         ]
+        # All card names in one pattern: group i+1 is card_name_patterns[i], and
+        # the lookahead reports the highest-priority name at every position.
+        # The text is lower-cased before matching, so the pattern is too and
+        # needs no IGNORECASE.
+        self.card_name_re = re.compile(
+            '(?=' + '|'.join(f'({pattern.lower()})' for pattern in self.card_name_patterns) + ')'
+        )
         
         # Set code pattern (e.g., LOB-001, MRD-060)
-        self.set_code_pattern = r'([A-Z]{2,4})-(\d{3})'
+        self.set_code_pattern = re.compile(r'([A-Z]{2,4})-(\d{3})')
         
         # Rarity keywords (both English and Japanese)
         self.rarity_keywords = {
@@ -76,6 +231,24 @@ class TextAnalyzer:
             'poor': ['poor', 'pr', 'プア', '傷あり']
         }
         
+        # Confidence weight per rarity; rarities not listed add nothing
+        self.rarity_scores = {
+            'ghost rare': 0.15, 'ultimate rare': 0.15, 'starlight rare': 0.15, 'quarter century': 0.15,
+            'secret rare': 0.1, 'collector\'s rare': 0.1, 'prismatic secret rare': 0.1,
+            'ultra rare': 0.08, 'gold rare': 0.08, 'platinum rare': 0.08,
+            'super rare': 0.05, 'parallel rare': 0.05,
+            'rare': 0.03
+        }
+        
+        # Confidence weight per region; any other known region adds the default
+        self.region_scores = {'japanese': 0.08, 'asia': 0.08}
+        self.default_region_score = 0.05
+        
+        # Rarities valuable enough that a known card and set code need no LLM check
+        self.decisive_rarities = frozenset(
+            rarity for rarity, weight in self.rarity_scores.items() if weight >= 0.08
+        )
+        
         # Special keywords that might indicate value
         self.value_indicators = [
             'limited', '限定', 'promo', '特典', 'tournament', '大会',
@@ -83,37 +256,42 @@ class TextAnalyzer:
             'sealed', '未開封', 'unopened', '初期', 'shoki', '旧アジア',
             'kyuu-ajia', 'PSA', 'BGS', 'エラーカード', 'error card'
         ]
+        
+        # Every keyword table above, compiled into one scanner so the listing
+        # text is read once instead of once per keyword
+        keyword_tables = (self.rarity_keywords, self.edition_keywords,
+                          self.region_keywords, self.condition_keywords)
+        self.keyword_scanner = KeywordScanner(
+            [keyword.lower() for table in keyword_tables for keywords in table.values() for keyword in keywords]
+            + [indicator.lower() for indicator in self.value_indicators]
+        )
+        
+        # Label tuple and keyword -> label index map per table
+        self.rarity_labels, self.rarity_ranks = keyword_ranks(self.rarity_keywords)
+        self.edition_labels, self.edition_ranks = keyword_ranks(self.edition_keywords)
+        self.region_labels, self.region_ranks = keyword_ranks(self.region_keywords)
+        self.condition_labels, self.condition_ranks = keyword_ranks(self.condition_keywords)
+        self.value_indicator_ranks = {}
+        for index, indicator in enumerate(self.value_indicators):
+            self.value_indicator_ranks.setdefault(indicator.lower(), index)
+
+    def _matched_ranks(self, found: set, ranks: Dict[str, int]) -> List[int]:
+        """Return the sorted label indexes that have a keyword in found."""
+        return sorted({ranks[keyword] for keyword in found if keyword in ranks})
 
     def analyze_text(self, text: str) -> Dict[str, Any]:
         """Analyze text using OpenAI's API with improved error handling."""
         try:
-            # Prepare the prompt
-            prompt = f"""Analyze this Yu-Gi-Oh card listing and extract key information:
-            {text}
-            
-            Please provide a structured analysis with the following information:
-            1. Card Name
-            2. Set Code
-            3. Card Number
-            4. Rarity
-            5. Edition (1st Edition or Unlimited)
-            6. Language/Region
-            7. Condition
-            8. Is this a valuable card? (Yes/No)
-            9. Confidence Score (0-1)
-            10. Matched Keywords
-            
-            Format the response as a JSON object."""
-
             # Make the API call with the updated model
-            response = openai.ChatCompletion.create(
-                model="gpt-4-turbo-preview",  # Updated model name
+            response = self.client.chat.completions.create(
+                model=self.model,
                 messages=[
-                    {"role": "system", "content": "You are a Yu-Gi-Oh card expert. Analyze the listing and provide structured information."},
-                    {"role": "user", "content": prompt}
+                    {"role": "system", "content": TEXT_ANALYSIS_SYSTEM_PROMPT},
+                    {"role": "user", "content": f"Analyze this Yu-Gi-Oh card listing and extract key information:\n{text}"}
                 ],
                 temperature=0.3,
-                max_tokens=500
+                max_tokens=500,
+                response_format={"type": "json_object"}
             )
 
             # Extract and parse the response
@@ -122,82 +300,373 @@ class TextAnalyzer:
                 analysis = json.loads(analysis_text)
                 return analysis
             except json.JSONDecodeError:
-                logging.error(f"Failed to parse OpenAI response as JSON: {analysis_text}")
+                logger.error(f"Failed to parse OpenAI response as JSON: {analysis_text}")
                 return {
                     "error": "Failed to parse analysis",
                     "raw_response": analysis_text
                 }
 
-        except openai.error.APIError as e:
-            logging.error(f"OpenAI API error: {str(e)}")
+        except openai.APIError as e:
+            logger.error(f"OpenAI API error: {str(e)}")
             return {"error": f"API error: {str(e)}"}
         except Exception as e:
-            logging.error(f"Error in text analysis: {str(e)}")
+            logger.error(f"Error in text analysis: {str(e)}")
             return {"error": f"Analysis error: {str(e)}"}
 
+    def analyze_listing(self, title: str, description: str, force_llm: bool = False) -> Dict[str, Any]:
+        """
+        Analyze a listing with the rules first, and with the LLM only if they are inconclusive.
+        
+        Args:
+            title: Listing title
+            description: Listing description
+            force_llm: Always ask the LLM, even when the rule-based result is decisive
+            
+        Returns:
+            The rule-based analysis when it is decisive, otherwise the LLM analysis
+            with any fields it left empty filled in from the rules
+        """
+        rule_analysis = self._analyze_with_rules(title, description)
+        decisive = not force_llm and self._is_decisive(rule_analysis)
+        self._record_rule_checks(1, int(decisive))
+        if decisive:
+            # Runs once per listing; don't build the message unless it's logged
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Rule-based analysis is decisive, skipping LLM for: {title}")
+            return rule_analysis
+        
+        return self._merge_analyses(rule_analysis, self._analyze_with_llm(title, description))
+
+    def analyze_listings(self, listings: List[Tuple[str, str]], force_llm: bool = False) -> List[Dict[str, Any]]:
+        """
+        Analyze many listings, sending the ones the rules can't settle to the LLM in batches.
+        
+        Args:
+            listings: (title, description) pairs
+            force_llm: Always ask the LLM, even when the rule-based result is decisive
+            
+        Returns:
+            One analysis per listing, in input order, as analyze_listing would return
+        """
+        results = [self._analyze_with_rules(title, description) for title, description in listings]
+        pending = [index for index, rule_analysis in enumerate(results)
+                   if force_llm or not self._is_decisive(rule_analysis)]
+        self._record_rule_checks(len(results), len(results) - len(pending))
+        
+        for start in range(0, len(pending), LLM_BATCH_SIZE):
+            batch = []
+            for index in pending[start:start + LLM_BATCH_SIZE]:
+                cached = self._cached_llm_analysis(*listings[index])
+                if cached is not None:
+                    results[index] = self._merge_analyses(results[index], cached)
+                else:
+                    batch.append(index)
+            if not batch:
+                continue
+            
+            batch_listings = [listings[index] for index in batch]
+            analyses = self._analyze_many_with_llm(batch_listings)
+            if analyses is None:
+                # Fall back to one request per listing
+                analyses = [self._analyze_with_llm(title, description) for title, description in batch_listings]
+            else:
+                for (title, description), analysis in zip(batch_listings, analyses):
+                    self._store_llm_analysis(title, description, analysis)
+            for index, analysis in zip(batch, analyses):
+                results[index] = self._merge_analyses(results[index], analysis)
+        
+        return results
+
+    def _is_decisive(self, rule_analysis: Dict[str, Any]) -> bool:
+        """Return True if the rule-based result leaves nothing for the LLM to settle."""
+        has_name = bool(rule_analysis['card_name_jp'])
+        has_set = bool(rule_analysis['set_code'])
+        
+        # Unrecognised listings are exactly what the LLM is for, so only a
+        # known card with its set code and either a high rarity or enough
+        # supporting detail counts as settled
+        return has_name and has_set and (
+            rule_analysis['rarity_en'] in self.decisive_rarities
+            or rule_analysis['confidence_score'] >= RULE_CONFIDENCE_THRESHOLD
+        )
+
+    def _record_rule_checks(self, checked: int, settled: int) -> None:
+        """Count listings the rules settled without the LLM and log the running hit rate."""
+        self.rule_checks += checked
+        self.rule_hits += settled
+        if self.rule_checks and logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Rule-based hit rate: {self.rule_hits}/{self.rule_checks} "
+                         f"({self.rule_hits / self.rule_checks:.0%})")
+
+    @staticmethod
+    def _merge_analyses(rule_analysis: Dict[str, Any], llm_analysis: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Return the LLM analysis, with fields it left empty taken from the rule-based one."""
+        if not llm_analysis:
+            return rule_analysis
+        merged = dict(rule_analysis)
+        merged.update((key, value) for key, value in llm_analysis.items() if value not in (None, ''))
+        return merged
+
+    def _llm_request(self, title: str, description: str) -> Dict[str, Any]:
+        """Return the chat completion arguments for extracting one listing's fields."""
+        return {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": LLM_SYSTEM_PROMPT},
+                {"role": "user", "content": f'Title: "{title}"\nDescription: "{description}"'}
+            ],
+            "temperature": 0.1,  # Low temperature for more consistent results
+            "max_tokens": LLM_MAX_TOKENS_PER_LISTING,
+            # JSON mode: the reply is always a bare JSON object, never fenced
+            "response_format": {"type": "json_object"}
+        }
+
+    def _parse_llm_json(self, content: str) -> Optional[Dict[str, Any]]:
+        """Parse the model's JSON answer, or return None if it isn't valid JSON."""
+        try:
+            return json.loads(content)
+        except json.JSONDecodeError as e:
+            logger.error(f"Failed to parse LLM response as JSON: {str(e)}")
+            return None
+
+    def _llm_cache_key(self, title: str, description: str) -> bytes:
+        """Digest of a listing's text, so cache keys don't hold whole descriptions."""
+        return hashlib.blake2b(f"{title}\n{description}".encode("utf-8"), digest_size=16).digest()
+
+    def _cached_llm_analysis(self, title: str, description: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of a fresh cached LLM answer for the listing, or None."""
+        key = self._llm_cache_key(title, description)
+        entry = self._llm_cache.get(key)
+        if entry is None:
+            return None
+        stored_at, analysis = entry
+        if time.monotonic() - stored_at > LLM_CACHE_TTL:
+            del self._llm_cache[key]
+            return None
+        self._llm_cache.move_to_end(key)
+        return copy.deepcopy(analysis)
+
+    def _store_llm_analysis(self, title: str, description: str, analysis: Optional[Dict[str, Any]]) -> None:
+        """Cache a successful LLM answer; failures are retried next time."""
+        if not analysis:
+            return
+        self._llm_cache[self._llm_cache_key(title, description)] = (time.monotonic(), copy.deepcopy(analysis))
+        if len(self._llm_cache) > LLM_CACHE_SIZE:
+            self._llm_cache.popitem(last=False)
+
     def _analyze_with_llm(self, title: str, description: str) -> Optional[Dict[str, Any]]:
-        """Analyze text using OpenAI's GPT model."""
+        """Analyze text using OpenAI's GPT model, reusing the answer for repeated listings."""
+        cached = self._cached_llm_analysis(title, description)
+        if cached is not None:
+            return cached
+        
         try:
-            # Construct the prompt
-            prompt = f"""Given the following Japanese item title and description for a trading card:
-Title: "{title}"
-Description: "{description}"
+            # Stream the answer and stop reading as soon as the JSON object closes
+            buffer = _JSONObjectBuffer()
+            stream = self.client.chat.completions.create(**self._llm_request(title, description), stream=True)
+            try:
+                for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content and buffer.feed(chunk.choices[0].delta.content):
+                        break
+            finally:
+                stream.close()
+            
+            # Extract and parse the JSON response
+            analysis = self._parse_llm_json(buffer.text)
+            self._store_llm_analysis(title, description, analysis)
+            return analysis
+            
+        except Exception as e:
+            logger.error(f"Error in LLM analysis: {str(e)}")
+            return None
 
-Extract the following information into a structured JSON object with these exact keys: "card_name_jp", "card_name_en", "set_name_jp", "set_code", "card_number", "rarity_jp", "rarity_en", "edition_jp", "edition_en", "language", "condition_notes_from_description", "seller_rank_from_description".
-If information for a key is not present, use null or an empty string for its value. Focus on information explicitly stated or strongly implied. For "condition_notes_from_description", list all phrases related to condition. For "seller_rank_from_description", extract only the rank (e.g., "A", "S", "B+").
+    async def _analyze_with_llm_async(self,
+                                      client: "openai.AsyncOpenAI",
+                                      title: str,
+                                      description: str) -> Optional[Dict[str, Any]]:
+        """Async version of _analyze_with_llm that sends its request through the given client."""
+        cached = self._cached_llm_analysis(title, description)
+        if cached is not None:
+            return cached
+        
+        try:
+            buffer = _JSONObjectBuffer()
+            stream = await client.chat.completions.create(**self._llm_request(title, description), stream=True)
+            try:
+                async for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content and buffer.feed(chunk.choices[0].delta.content):
+                        break
+            finally:
+                await stream.close()
+            analysis = self._parse_llm_json(buffer.text)
+            self._store_llm_analysis(title, description, analysis)
+            return analysis
+            
+        except Exception as e:
+            logger.error(f"Error in LLM analysis: {str(e)}")
+            return None
 
-Return ONLY the JSON object, no other text."""
+    async def analyze_many_with_llm(self,
+                                    listings: List[Tuple[str, str]],
+                                    concurrency: int = 10) -> List[Optional[Dict[str, Any]]]:
+        """
+        Extract fields for many listings concurrently, with at most `concurrency` requests in flight.
+        
+        Args:
+            listings: (title, description) pairs
+            concurrency: Maximum number of simultaneous OpenAI requests
+            
+        Returns:
+            One LLM analysis (or None on failure) per listing, in input order
+        """
+        # The client retries timeouts, rate limits and 5xx responses with
+        # exponential backoff on its own
+        client = openai.AsyncOpenAI(max_retries=3)
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def bounded(title: str, description: str) -> Optional[Dict[str, Any]]:
+            async with semaphore:
+                return await self._analyze_with_llm_async(client, title, description)
+        
+        try:
+            return await asyncio.gather(*(bounded(title, description) for title, description in listings))
+        finally:
+            await client.close()
 
-            # Make the API call
+    def analyze_listings_batch(self, listings: List[Tuple[str, str]]) -> List[Optional[Dict[str, Any]]]:
+        """
+        Extract fields for many listings with one OpenAI Batch API job.
+        
+        Batch jobs cost half as much as individual requests but may take up to
+        24 hours, so this is meant for offline runs over large scrapes.
+        
+        Args:
+            listings: (title, description) pairs
+            
+        Returns:
+            One LLM analysis (or None on failure) per listing, in input order
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(listings)
+        if not listings:
+            return results
+        
+        try:
+            # One JSONL request line per listing, keyed by its index
+            lines = [
+                json.dumps({
+                    "custom_id": str(index),
+                    "method": "POST",
+                    "url": "/v1/chat/completions",
+                    "body": self._llm_request(title, description)
+                })
+                for index, (title, description) in enumerate(listings)
+            ]
+            
+            batch_input = self.client.files.create(
+                file=("listing_extraction_batch.jsonl", "\n".join(lines).encode("utf-8")),
+                purpose="batch"
+            )
+            batch = self.client.batches.create(
+                input_file_id=batch_input.id,
+                endpoint="/v1/chat/completions",
+                completion_window="24h"
+            )
+            logger.info(f"Submitted batch {batch.id} with {len(listings)} listings")
+            
+            # Poll quickly at first for small jobs, backing off for long ones
+            poll_interval = BATCH_POLL_INITIAL
+            while batch.status not in ("completed", "failed", "expired", "cancelled"):
+                time.sleep(poll_interval)
+                poll_interval = min(poll_interval * 2, BATCH_POLL_MAX)
+                batch = self.client.batches.retrieve(batch.id)
+            
+            if batch.status != "completed" or not batch.output_file_id:
+                logger.error(f"Batch {batch.id} finished with status {batch.status}")
+                return results
+            
+            # Output lines are not guaranteed to be in input order
+            for line in self.client.files.content(batch.output_file_id).text.splitlines():
+                if not line:
+                    continue
+                output = json.loads(line)
+                index = int(output["custom_id"])
+                try:
+                    body = output["response"]["body"]
+                    results[index] = self._parse_llm_json(body["choices"][0]["message"]["content"])
+                except Exception as e:
+                    logger.error(f"Error in batch LLM analysis for listing {index}: {str(e)}")
+            
+            return results
+            
+        except Exception as e:
+            logger.error(f"Error in batch LLM analysis: {str(e)}")
+            return results
+
+    def _analyze_many_with_llm(self, listings: List[Tuple[str, str]]) -> Optional[List[Dict[str, Any]]]:
+        """Analyze several listings in one request; None if the reply doesn't line up with them."""
+        try:
+            listing_text = "\n\n".join(
+                f'[{number}] Title: "{title}"\nDescription: "{description}"'
+                for number, (title, description) in enumerate(listings, 1)
+            )
             response = self.client.chat.completions.create(
-                model="gpt-4-turbo-preview",  # Using the latest GPT-4 model
+                model=self.model,
                 messages=[
-                    {"role": "system", "content": "You are a specialized parser for Japanese trading card listings. Extract structured information from the given text and return it as a JSON object."},
-                    {"role": "user", "content": prompt}
+                    {"role": "system", "content": LLM_BATCH_SYSTEM_PROMPT},
+                    {"role": "user", "content": listing_text}
                 ],
-                temperature=0.1,  # Low temperature for more consistent results
-                max_tokens=500
+                temperature=0.1,
+                max_tokens=LLM_MAX_TOKENS_PER_LISTING * len(listings),
+                response_format={"type": "json_object"}
             )
             
-            # Extract and parse the JSON response
-            try:
-                json_str = response.choices[0].message.content.strip()
-                # Remove any markdown code block markers
-                json_str = re.sub(r'^```json\s*|\s*```$', '', json_str)
-                return json.loads(json_str)
-            except json.JSONDecodeError as e:
-                logging.error(f"Failed to parse LLM response as JSON: {str(e)}")
+            # JSON mode only returns objects, so the array comes wrapped in one
+            analyses = json.loads(response.choices[0].message.content).get("listings")
+            if (not isinstance(analyses, list) or len(analyses) != len(listings)
+                    or not all(isinstance(analysis, dict) for analysis in analyses)):
+                logger.warning(f"Batched LLM response did not match {len(listings)} listings")
                 return None
+            return analyses
             
         except Exception as e:
-            logging.error(f"Error in LLM analysis: {str(e)}")
+            logger.error(f"Error in batched LLM analysis: {str(e)}")
             return None
 
     def _analyze_with_rules(self, title: str, description: str) -> Dict[str, Any]:
+        """Analyze text using rule-based methods, reusing the result for repeated listings."""
+        # A fresh dict, so callers can't change the cached result
+        return self._rules_cache(title, description).to_dict()
+
+    def _analyze_with_rules_uncached(self, title: str, description: str) -> RuleAnalysis:
         """Analyze text using rule-based methods."""
         # Combine title and description for analysis
-        full_text = f"{title} {description}".lower()
+        original_text = f"{title} {description}"
+        full_text = original_text.lower()
+        
+        # Every known keyword in the text, found in a single pass
+        found = self.keyword_scanner.find(full_text)
         
         # Extract card name
         card_name = self._extract_card_name(full_text)
         
-        # Extract set code and card number
-        set_code, card_number = self._extract_set_info(full_text)
+        # Extract set code and card number (set codes are upper-case, so this
+        # needs the original text)
+        set_code, card_number = self._extract_set_info(original_text)
         
         # Extract rarity
-        rarity = self._extract_rarity(full_text)
+        rarity = self._extract_rarity(found)
         
         # Extract edition
-        edition = self._extract_edition(full_text)
+        edition = self._extract_edition(found)
         
         # Extract region
-        region = self._extract_region(full_text)
+        region = self._extract_region(found)
         
         # Extract condition keywords
-        condition_keywords = self._extract_condition_keywords(full_text)
+        condition_keywords = self._extract_condition_keywords(found)
         
         # Extract value indicators
-        value_indicators = self._extract_value_indicators(full_text)
+        value_indicators = self._extract_value_indicators(found)
         
         # Calculate confidence score
         confidence_score = self._calculate_confidence_score(
@@ -211,70 +680,67 @@ Return ONLY the JSON object, no other text."""
             value_indicators=value_indicators
         )
         
-        return {
-            'card_name_jp': card_name,
-            'card_name_en': None,  # Rule-based analysis can't reliably extract English names
-            'set_name_jp': None,  # Rule-based analysis can't reliably extract Japanese set names
-            'set_code': set_code,
-            'card_number': card_number,
-            'rarity_jp': rarity,
-            'rarity_en': rarity,  # For rule-based, we use the same value
-            'edition_jp': edition,
-            'edition_en': edition,  # For rule-based, we use the same value
-            'language': region,
-            'condition_notes_from_description': condition_keywords,
-            'seller_rank_from_description': None,  # Rule-based analysis can't reliably extract seller rank
-            'confidence_score': confidence_score
-        }
+        return RuleAnalysis(
+            card_name_jp=card_name,
+            card_name_en=None,  # Rule-based analysis can't reliably extract English names
+            set_name_jp=None,  # Rule-based analysis can't reliably extract Japanese set names
+            set_code=set_code,
+            card_number=card_number,
+            rarity_jp=rarity,
+            rarity_en=rarity,  # For rule-based, we use the same value
+            edition_jp=edition,
+            edition_en=edition,  # For rule-based, we use the same value
+            language=region,
+            condition_notes_from_description=tuple(condition_keywords),
+            seller_rank_from_description=None,  # Rule-based analysis can't reliably extract seller rank
+            confidence_score=confidence_score
+        )
 
     def _extract_card_name(self, text: str) -> Optional[str]:
         """Extract card name from text."""
-        for pattern in self.card_name_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                return match.group(0)
-        return None
+        # Earlier patterns win regardless of where in the text they occur
+        best = None
+        for match in self.card_name_re.finditer(text):
+            if best is None or match.lastindex < best.lastindex:
+                best = match
+                if best.lastindex == 1:
+                    break
+        return best.group(best.lastindex) if best else None
 
     def _extract_set_info(self, text: str) -> Tuple[Optional[str], Optional[str]]:
         """Extract set code and card number from text."""
-        match = re.search(self.set_code_pattern, text)
+        # Every set code contains a hyphen; most listings have none
+        if '-' not in text:
+            return None, None
+        match = self.set_code_pattern.search(text)
         if match:
             return match.group(1), match.group(2)
         return None, None
 
-    def _extract_rarity(self, text: str) -> Optional[str]:
-        """Extract rarity from text."""
-        for rarity, keywords in self.rarity_keywords.items():
-            if any(keyword.lower() in text.lower() for keyword in keywords):
-                return rarity
-        return None
-
-    def _extract_edition(self, text: str) -> Optional[str]:
-        """Extract edition from text."""
-        for edition, keywords in self.edition_keywords.items():
-            if any(keyword.lower() in text.lower() for keyword in keywords):
-                return edition
-        return None
-
-    def _extract_region(self, text: str) -> Optional[str]:
-        """Extract region from text."""
-        for region, keywords in self.region_keywords.items():
-            if any(keyword.lower() in text.lower() for keyword in keywords):
-                return region
-        return None
-
-    def _extract_condition_keywords(self, text: str) -> List[str]:
-        """Extract condition keywords from text."""
-        found_keywords = []
-        for condition, keywords in self.condition_keywords.items():
-            if any(keyword.lower() in text.lower() for keyword in keywords):
-                found_keywords.append(condition)
-        return found_keywords
-
-    def _extract_value_indicators(self, text: str) -> List[str]:
-        """Extract value indicators from text."""
-        return [indicator for indicator in self.value_indicators 
-                if indicator.lower() in text.lower()]
+    def _extract_rarity(self, found: set) -> Optional[str]:
+        """Extract rarity from the keywords found in the text."""
+        matched = self._matched_ranks(found, self.rarity_ranks)
+        return self.rarity_labels[matched[0]] if matched else None
+
+    def _extract_edition(self, found: set) -> Optional[str]:
+        """Extract edition from the keywords found in the text."""
+        matched = self._matched_ranks(found, self.edition_ranks)
+        return self.edition_labels[matched[0]] if matched else None
+
+    def _extract_region(self, found: set) -> Optional[str]:
+        """Extract region from the keywords found in the text."""
+        matched = self._matched_ranks(found, self.region_ranks)
+        return self.region_labels[matched[0]] if matched else None
+
+    def _extract_condition_keywords(self, found: set) -> List[str]:
+        """Extract condition keywords from the keywords found in the text."""
+        return [self.condition_labels[index]
+                for index in self._matched_ranks(found, self.condition_ranks)]
+
+    def _extract_value_indicators(self, found: set) -> List[str]:
+        """Extract value indicators from the keywords found in the text."""
+        return [self.value_indicators[index]
+                for index in self._matched_ranks(found, self.value_indicator_ranks)]
 
     def _calculate_confidence_score(self,
                                   card_name: Optional[str],
@@ -298,16 +764,7 @@ Return ONLY the JSON object, no other text."""
         
         # Rarity score
         if rarity:
-            if rarity.lower() in ['ghost rare', 'ultimate rare', 'starlight rare', 'quarter century']:
-                score += 0.15
-            elif rarity.lower() in ['secret rare', 'collector\'s rare', 'prismatic secret rare']:
-                score += 0.1
-            elif rarity.lower() in ['ultra rare', 'gold rare', 'platinum rare']:
-                score += 0.08
-            elif rarity.lower() in ['super rare', 'parallel rare']:
-                score += 0.05
-            elif rarity.lower() == 'rare':
-                score += 0.03
+            score += self.rarity_scores.get(rarity.lower(), 0.0)
         
         # Edition score
         if edition == '1st edition':
@@ -315,10 +772,7 @@ Return ONLY the JSON object, no other text."""
         
         # Region score
         if region:
-            if region.lower() in ['japanese', 'asia']:
-                score += 0.08
-            else:
-                score += 0.05
+            score += self.region_scores.get(region.lower(), self.default_region_score)
         
         # Condition keywords score
         if len(condition_keywords) >= 2: